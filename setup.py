@@ -29,6 +29,7 @@ setup(
         'Jinja2',
         'six',
         'prettytable',
+        'futures; python_version<"3"',
     ],
     extras_require={'test': [
         'pytest-mock',
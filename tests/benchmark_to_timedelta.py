@@ -0,0 +1,36 @@
+"""Microbenchmark of `to_timedelta` on typical report time values.
+
+Run from the repository root with
+`PYTHONPATH=. python tests/benchmark_to_timedelta.py`.
+"""
+from __future__ import print_function
+import itertools
+import random
+import timeit
+
+from xunit2testrail.vendor import xunitparser
+
+random.seed(0)
+# times are rounded to milliseconds usually, so values repeat
+VALUES = list(itertools.chain(
+    ('{:.3f}'.format(random.randint(0, 3000) / 1000.0) for _ in range(50000)),
+    ('{}ms'.format(random.randint(0, 999)) for _ in range(10000)),
+    ('{}m{:.1f}s'.format(random.randint(0, 5), random.random() * 60)
+     for _ in range(10000))))
+
+
+def parse_all():
+    for value in VALUES:
+        xunitparser.to_timedelta(value)
+
+
+def parse_all_uncached():
+    xunitparser._timedelta_cache.clear()
+    parse_all()
+
+
+if __name__ == '__main__':
+    for func in (parse_all_uncached, parse_all):
+        best = min(timeit.repeat(func, number=1, repeat=5))
+        print('{}: {:.1f} ns per value'.format(
+            func.__name__, best / len(VALUES) * 1e9))
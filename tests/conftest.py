@@ -8,10 +8,10 @@ import six
 from xunit2testrail import Reporter
 from xunit2testrail.testrail.client import Client
 
+collect_ignore = []
 if six.PY2:
-    import mock
-else:
-    from unittest import mock
+    # asyncio based client is available on Python 3 only
+    collect_ignore.append('testrail/test_aio.py')
 
 
 @pytest.yield_fixture
@@ -22,10 +22,13 @@ def api_mock():
 
 @pytest.fixture
 def testrail_client(mocker):
-    fake_statuses = mock.PropertyMock(return_value={1: 'passed', 2: 'skipped'})
     mocker.patch(
-        'xunit2testrail.reporter.TrClient.statuses',
-        new_callable=fake_statuses)
+        'xunit2testrail.reporter.TrClient.get_statuses',
+        return_value=[
+            {'id': 1, 'name': 'passed', 'label': 'Passed'},
+            {'id': 2, 'name': 'skipped', 'label': 'Skipped'},
+            {'id': 6, 'name': 'custom_status1', 'label': 'Product Bug'},
+        ])
     return
 
 
@@ -1,8 +1,11 @@
 import sys
 
 import pytest
+import requests
 
 from xunit2testrail import cmd
+from xunit2testrail.testrail.client import Case
+from xunit2testrail.vendor import xunitparser
 
 
 def test_parse_args_return_not_bytes():
@@ -43,6 +46,14 @@ def test_reporter_dry_run_table_header(mocker, capsys):
     assert all(s in out for s in ('ID', 'Tilte', 'Xunit case'))
 
 
+def test_print_suggestions_table(capsys):
+    suggestions = [(xunitparser.TestCase('a.B', 'test_boot'),
+                    [(0.75, Case(id=1, title='test_boot_server'))])]
+    cmd.print_suggestions_table(suggestions)
+    out, err = capsys.readouterr()
+    assert all(s in out for s in ('Title', 'test_boot_server', '0.75'))
+
+
 @pytest.mark.parametrize('method',
                          ['get_or_create_plan', 'get_or_create_test_run'])
 def test_dry_run_not_create_entities_in_testrail(mocker, method):
@@ -54,3 +65,50 @@ def test_dry_run_not_create_entities_in_testrail(mocker, method):
     mocker.patch.object(sys, 'argv', testargs)
     cmd.main()
     assert not method_mock.called
+
+
+@pytest.mark.parametrize('stale', [False, True])
+def test_stale_cases_are_fetched_again(mocker, stale):
+    mocker.patch('xunit2testrail.reporter.Reporter.map_cases')
+    mocker.patch('xunit2testrail.reporter.Reporter.fill_case_results',
+                 return_value=[Case(id=1)])
+    mocker.patch('xunit2testrail.reporter.Reporter.get_or_create_plan')
+    mocker.patch('xunit2testrail.reporter.Reporter.is_stale_cases_error',
+                 return_value=stale)
+    resync = mocker.patch('xunit2testrail.reporter.Reporter.resync_cases')
+    create_run = mocker.patch(
+        'xunit2testrail.reporter.Reporter.get_or_create_test_run',
+        side_effect=[requests.HTTPError('invalid case_ids'), mocker.Mock()])
+    mocker.patch('xunit2testrail.reporter.Reporter.print_run_url')
+    testargs = ['report', 'tests/xunit_files/report.xml',
+                '--testrail-plan-name', 'testplan']
+    mocker.patch.object(sys, 'argv', testargs)
+    if stale:
+        cmd.main()
+        assert create_run.call_count == 2
+    else:
+        with pytest.raises(requests.HTTPError):
+            cmd.main()
+    assert resync.call_count == int(stale)
+
+
+def test_parse_args_many_reports(tmpdir):
+    shards = tmpdir.mkdir('shards')
+    for name in ('b.xml', 'a.xml', 'notes.txt'):
+        shards.join(name).write('<testsuite/>')
+    shards.mkdir('nested').join('c.xml').write('<testsuite/>')
+    parsed_args = cmd.parse_args([
+        'tests/xunit_files/report.xml', str(shards),
+        str(shards.join('*.xml'))])
+    assert parsed_args.xunit_report == [
+        ['tests/xunit_files/report.xml'],
+        [str(shards.join('a.xml')), str(shards.join('b.xml')),
+         str(shards.join('nested', 'c.xml'))],
+        [str(shards.join('a.xml')), str(shards.join('b.xml'))],
+    ]
+
+
+def test_parse_args_no_reports_by_glob(tmpdir, capsys):
+    with pytest.raises(SystemExit):
+        cmd.parse_args([str(tmpdir.join('*.xml'))])
+    assert 'matches no files' in capsys.readouterr()[1]
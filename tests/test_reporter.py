@@ -3,6 +3,7 @@ import datetime
 import re
 
 import pytest
+import requests
 import six
 from six.moves import StringIO
 
@@ -44,6 +45,166 @@ def test_parse_report(reporter):
     assert len(result.failures) == 13
 
 
+def test_parse_report_summary(reporter, mocker):
+    from xunit2testrail.vendor import xunitparser
+    run = mocker.spy(xunitparser.TestSuite, 'run')
+    suite, result = reporter.get_xunit_test_suite()
+    assert result.counts == {'success': 27, 'failure': 13, 'error': 0,
+                             'skipped': 25}
+    assert result.testsRun == 65
+    assert not result.wasSuccessful()
+    assert result.cases_time > datetime.timedelta(0)
+    assert run.call_count == 0
+    assert len(result.errors) == 0
+    assert result.result.time == result.time
+    assert run.call_count == 1
+
+
+def test_cases_keep_mapper_fields(reporter, suite):
+    from xunit2testrail import utils
+    reporter._cache['suite'] = suite
+    reporter.case_mapper = utils.IdCaseMapper(
+        u'{id}', u'{custom_report_label}', testrail_uuid_field='custom_uuid')
+    fields = reporter.case_fields
+    assert {'title', 'section_id', 'custom_report_label',
+            'custom_uuid'} <= fields
+    assert 'custom_test_case_steps' not in fields
+    assert reporter.suite.cases.fields is None
+    assert reporter.cases[0].data == {'suite_id': 2, 'title': 'case title'}
+
+
+def test_iter_xunit_cases(reporter):
+    suite, _ = reporter.get_xunit_test_suite()
+    cases = list(reporter.iter_xunit_cases())
+    assert len(cases) == 65
+
+    def describe(case):
+        return (case.classname, case.methodname, case.result, case.message,
+                case.trace, case.stdout, case.stderr, case.time)
+
+    assert [describe(x) for x in cases] == [describe(x) for x in suite]
+
+
+def test_iterparse_drops_processed_elements(mocker):
+    from xml.etree import ElementTree
+    from xunit2testrail.vendor import xunitparser
+    report = six.BytesIO(
+        b'<testsuites><testsuite name="s">'
+        b'<testcase classname="a.B" name="test_1"><system-out>out'
+        b'</system-out></testcase>'
+        b'<testcase name="test_2"><failure message="m">trace</failure>'
+        b'</testcase></testsuite></testsuites>')
+    iterparse = mocker.spy(ElementTree, 'iterparse')
+    cases = xunitparser.iterparse(report)
+    first = next(cases)
+    assert (first.classname, first.stdout) == ('a.B', 'out')
+    second = next(cases)
+    assert (second.classname, second.result) == ('s', 'failure')
+    list(cases)
+    root = iterparse.spy_return.root
+    assert root.tag == 'testsuites' and len(root) == 0
+
+
+LAZY_REPORT = u"""<?xml version="1.0" encoding="{encoding}"?>
+<testsuites><testsuite name="s1">
+<testcase classname="a.B" name="t1" time="1.5"><system-out>
+  out &lt;tag&gt; сообщение <![CDATA[<raw> & ]]>
+</system-out><system-err>   </system-err></testcase>
+<testcase name="t2" attr="a>b"><properties>
+<property name="testrail_case_id" value="C1"/></properties>
+<failure message="m&amp;" type="E">
+line1\r\nline2 сообщение</failure></testcase>
+<testcase name="t3"/>
+<testcase name="t4">text before<skipped/></testcase>
+<testsuite name="s2"><testcase name="t5"><error message="e"/></testcase>
+</testsuite>
+<testcase name="t6"><system-out><!-- c -->after</system-out></testcase>
+<testcase name="t7"><failure>{trace}</failure>
+<system-out>{stdout}</system-out><system-err>{stderr}</system-err></testcase>
+</testsuite></testsuites>"""
+
+
+@pytest.mark.parametrize('encoding', ['utf-8', 'windows-1251'])
+def test_iterparse_lazy(reporter, tmpdir, mocker, encoding):
+    from xunit2testrail.vendor import xunitparser
+    report = tmpdir.join('report.xml')
+    report.write(LAZY_REPORT.format(
+        encoding=encoding,
+        trace=u'трасса\n' * 10000,
+        stdout=u'  stdout сообщение\n' * 5000,
+        stderr=u'e' * 70000 + u'  \n').encode(encoding), mode='wb')
+    reporter.xunit_report = str(report)
+
+    def describe(case):
+        return (case.classname, case.methodname, case.result, case.message,
+                case.typename, case.trace, case.stdout, case.stderr,
+                case.time, case.properties, reporter.build_paste_body(case))
+
+    cases = list(reporter.iter_xunit_cases())
+    expected = list(xunitparser.iterparse(str(report)))
+    assert len(cases) == 7
+    assert cases[1].properties == {'testrail_case_id': 'C1'}
+    assert [describe(x) for x in cases] == [describe(x) for x in expected]
+    assert isinstance(cases[-1].get_payload('stdout'), xunitparser.Payload)
+
+    # mapping is released, when results are made
+    mocker.patch.object(reporter, 'upload_pastes', return_value=[])
+    reporter.fill_case_results({Case(id=1): cases[-1]})
+    assert cases[-1].get_payload('stdout').report.data.closed
+
+
+def test_case_record(reporter):
+    from xunit2testrail.vendor import xunitparser
+    records = list(reporter.iter_xunit_cases())
+    assert all(type(x) is xunitparser.CaseRecord for x in records)
+    assert not hasattr(records[0], '__dict__')
+    classnames = set(id(x.classname) for x in records)
+    assert len(classnames) == len(set(x.classname for x in records))
+
+    suite, result = reporter.get_xunit_test_suite()
+    tests = [x.to_testcase() for x in records]
+    assert [str(x) for x in tests] == [str(x) for x in suite]
+    tests_result = xunitparser.TestResult()
+    for test in tests:
+        test.run(tests_result)
+    assert len(tests_result.failures) == len(result.failures)
+    assert records[0] == xunitparser.CaseRecord(records[0].classname,
+                                                records[0].methodname)
+    assert len(set(records)) == len(records)
+
+
+SHARD_REPORT = u"""<testsuite name="s">{}</testsuite>"""
+
+
+@pytest.mark.parametrize('policy, expected', (
+    ('last-wins', ['success', 'failure', 'success', 'skipped']),
+    ('worst-wins', ['error', 'failure', 'success', 'skipped']),
+))
+@pytest.mark.parametrize('workers', [1, 2])
+def test_iter_xunit_cases_many_reports(reporter, tmpdir, policy, expected,
+                                       workers):
+    shards = [
+        '<testcase name="t1"><error/></testcase>'
+        '<testcase name="t2"><system-out>out</system-out></testcase>',
+        '<testcase name="t3"/><testcase name="t2"><failure/></testcase>',
+        '<testcase name="t1"/><testcase name="t4"><skipped/></testcase>',
+    ]
+    reporter.xunit_report = []
+    for i, shard in enumerate(shards):
+        report = tmpdir.join('report{}.xml'.format(i))
+        report.write(SHARD_REPORT.format(shard))
+        reporter.xunit_report.append(str(report))
+    reporter.duplicates_policy = policy
+    reporter.parse_workers = workers
+
+    cases = list(reporter.iter_xunit_cases())
+
+    assert [x.methodname for x in cases] == ['t1', 't2', 't3', 't4']
+    assert [x.result for x in cases] == expected
+    suite, result = reporter.get_xunit_test_suite()
+    assert result.testsRun == 4
+
+
 def test_print_run_url(reporter, mocker):
     stdout = mocker.patch('sys.stdout', new=StringIO())
     reporter.print_run_url(mock.Mock(url='http://report_url/'))
@@ -117,3 +278,155 @@ def test_paste_store_data(api_mock, reporter, xunit_case, paste_api, prop,
     assert value in payload['code']
     for absent_prop in absent_props:
         assert absent_prop not in payload['code']
+
+
+def test_status_map(reporter, xunit_case):
+    reporter.testrail_status_map = {'success': 'skipped'}
+    testrail_case = Case()
+    reporter.add_result_to_case(testrail_case, xunit_case)
+    assert testrail_case.result.status_id == 2
+
+
+def test_status_map_by_label(reporter, xunit_case):
+    reporter.testrail_status_map = {'success': 'Product Bug'}
+    testrail_case = Case()
+    reporter.add_result_to_case(testrail_case, xunit_case)
+    assert testrail_case.result.status_id == 6
+
+
+def test_unknown_status(reporter, xunit_case, caplog):
+    xunit_case.result = 'failure'
+    testrail_case = Case()
+    assert reporter.add_result_to_case(testrail_case, xunit_case) is None
+    assert "Can't find status failed" in caplog.text
+
+
+def test_fill_case_results_uploads_pastes(api_mock, reporter, paste_api):
+    from xunit2testrail.vendor.xunitparser import TestCase as XunitCase
+    mapping = {}
+    for i in range(10):
+        xunit_case = XunitCase(classname='a.TestClass',
+                               methodname='test_{}'.format(i))
+        xunit_case.result = 'failure' if i % 2 else 'success'
+        xunit_case.time = datetime.timedelta(seconds=1)
+        xunit_case.trace = 'trace {}'.format(i)
+        mapping[Case(id=i)] = xunit_case
+    reporter.testrail_status_map = {'failure': 'skipped'}
+    reporter.paste_workers = 3
+
+    cases = reporter.fill_case_results(mapping)
+
+    assert [x.id for x in cases] == list(range(10))
+    assert api_mock.call_count == 5
+    for case in cases:
+        has_link = 'http://example.com/show/123/' in case.result.comment
+        assert has_link == bool(case.id % 2)
+
+
+def test_close(reporter, mocker):
+    sessions = [reporter.testrail_client.session,
+                reporter.paste_client.session]
+    for session in sessions:
+        mocker.spy(session, 'close')
+    with reporter:
+        pass
+    assert all(x.close.call_count == 1 for x in sessions)
+    assert 'testrail_client' not in reporter._cache
+
+
+def test_paste_retry(api_mock, reporter, xunit_case, mocker):
+    paste_url = re.escape('http://example.com/json/?method=pastes.newPaste')
+    api_mock.register_uri('POST', re.compile(paste_url), [
+        {'status_code': 503},
+        {'json': {'data': '123'}},
+    ])
+    sleep = mocker.patch('time.sleep')
+    link = reporter.save_to_paste(xunit_case)
+    assert link == "http://example.com/show/123/"
+    assert sleep.call_count == 1
+    assert api_mock.request_history[-1].timeout == (
+        reporter.paste_client.timeout)
+
+
+def test_paste_deduplication(api_mock, reporter, paste_api, tmpdir):
+    from xunit2testrail.vendor.xunitparser import TestCase as XunitCase
+    reporter.cache_dir = str(tmpdir)
+    mapping = {}
+    for i in range(6):
+        xunit_case = XunitCase(classname='a.TestClass',
+                               methodname='test_{}'.format(i))
+        xunit_case.result = 'failure'
+        xunit_case.time = datetime.timedelta(seconds=1)
+        xunit_case.trace = 'trace {}'.format(i % 2)
+        mapping[Case(id=i)] = xunit_case
+    reporter.testrail_status_map = {'failure': 'skipped'}
+
+    cases = reporter.fill_case_results(mapping)
+    assert len(cases) == 6
+    assert api_mock.call_count == 2
+    assert tmpdir.join('pastes.json').check()
+
+    # next run takes URLs from the cache
+    reporter._cache.clear()
+    reporter.fill_case_results(mapping)
+    assert api_mock.call_count == 2
+
+
+@pytest.mark.parametrize('cache_dir, status, text, expected', (
+    ('cache', 400, 'Field :case_ids contains invalid case IDs', True),
+    (None, 400, 'Field :case_ids contains invalid case IDs', False),
+    ('cache', 400, 'Field :name is required', False),
+    ('cache', 500, 'case_ids', False), ))
+def test_is_stale_cases_error(reporter, cache_dir, status, text, expected):
+    reporter.cache_dir = cache_dir
+    response = requests.Response()
+    response.status_code = status
+    response._content = text.encode('utf-8')
+    error = requests.HTTPError(text, response=response)
+    assert reporter.is_stale_cases_error(error) is expected
+    assert reporter.is_stale_cases_error(ValueError()) is False
+
+
+def test_resync_cases(reporter, tmpdir, mocker):
+    reporter.cache_dir = str(tmpdir)
+    snapshot = mocker.Mock()
+    reporter._cache.update(suite_snapshot=snapshot, cases=[Case(id=1)])
+    reporter.resync_cases()
+    assert snapshot.invalidate.call_count == 1
+    assert 'cases' not in reporter._cache
+
+
+def test_paste_cache_expiration(tmpdir, mocker):
+    from xunit2testrail.paste import PasteCache
+    path = str(tmpdir.join('pastes.json'))
+    cache = PasteCache(path, ttl=10)
+    cache.set('key', 'http://example.com/show/1/')
+    cache.save()
+    assert PasteCache(path, ttl=10).get('key') == 'http://example.com/show/1/'
+    mocker.patch('time.time', return_value=cache.pastes['key'][1] + 11)
+    assert PasteCache(path, ttl=10).get('key') is None
+
+
+@pytest.mark.parametrize('message', [None, u'сообщение', 'message'])
+@pytest.mark.parametrize('trace', [None, '', 'line 1\n  line 2\n\nline 4'])
+@pytest.mark.parametrize('paste_url', [None, 'http://example.com/show/1/'])
+def test_fast_comment_formatter(reporter, xunit_case, message, trace,
+                                paste_url):
+    xunit_case.seed('failure', message=message, trace=trace)
+    expected = reporter.render_comments([xunit_case], [paste_url])
+    reporter.comment_formatter = 'fast'
+    assert reporter.render_comments([xunit_case], [paste_url]) == expected
+
+
+def test_fast_comment_formatter_no_message(reporter, xunit_case):
+    expected = reporter.gen_testrail_comment(xunit_case)
+    reporter.comment_formatter = 'fast'
+    assert reporter.gen_testrail_comment(xunit_case) == expected
+    assert expected.startswith('Passed\n')
+
+
+def test_render_comments(reporter, xunit_case):
+    xunit_case.trace = 'line 1\nline 2'
+    comments = reporter.render_comments([xunit_case, xunit_case])
+    assert len(comments) == 2
+    assert '\n    line 1\n\n    line 2\n' in comments[0]
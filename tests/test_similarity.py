@@ -0,0 +1,26 @@
+from xunit2testrail import similarity
+
+
+def test_trigrams_are_normalized():
+    trigrams = similarity.get_trigrams(u'Test_Foo-bar')
+    assert trigrams == similarity.get_trigrams(u'test foo  bar')
+    assert similarity.get_trigrams(u'') == set()
+
+
+def test_search():
+    index = similarity.TrigramIndex([u'test_boot_server', None,
+                                     u'test_delete_volume',
+                                     u'test_boot_server_from_volume'])
+    assert len(index) == 4
+    result = index.search(u'test_boot_servers', count=2)
+    assert [i for _, i in result] == [0, 3]
+    assert result[0][0] > result[1][0]
+    assert index.search(u'test_boot_server', count=1) == [(1.0, 0)]
+    assert index.search(u'xyz') == []
+    assert all(score >= 0.5 for score, _ in
+               index.search(u'test_boot_server', min_score=0.5))
+
+
+def test_search_same_score_order():
+    index = similarity.TrigramIndex([u'abc', u'abc'])
+    assert index.search(u'abc') == [(1.0, 0), (1.0, 1)]
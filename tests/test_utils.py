@@ -1,3 +1,5 @@
+import re
+
 import pytest
 
 from xunit2testrail.testrail import client
@@ -107,6 +109,80 @@ def test_match_case(template_mapper, methodname, match_value, x_name_template,
     assert len(result) == map_len
 
 
+def _linear_suitable_cases(mapper, xunit_id, cases):
+    """Reference matching: compare xUnit id with groups of each case."""
+    split_symbols = ''.join(
+        x for x in (r'a-zA-Z', r'\(\)', r'\[\]', r',')
+        if re.search(r'[{}]'.format(x), xunit_id) is None)
+    result = []
+    for case in cases:
+        testrail_id = mapper.testrail_name_template.format(
+            **mapper.describe_testrail_case(case))
+        if not split_symbols:
+            groups = [testrail_id]
+        else:
+            groups = re.split(r'[{}]'.format(split_symbols), testrail_id)
+        result.extend(case for x in groups if x == xunit_id)
+    return result
+
+
+@pytest.mark.parametrize('template', ['{id}', '{methodname}', '{uuid}'])
+def test_indexed_matching(template_mapper, template):
+    from xunit2testrail.vendor import xunitparser
+    labels = ['12345', '(12345)', '12345,54321', 'test_a[(12345)]',
+              '[12345][12345]', 'test_a', 'test_b[a,b]', '54321',
+              'id-2390f766-836d-40ef-9aeb-e810d78207fb',
+              '2390f766-836d-40ef-9aeb-e810d78207fb', 'a,b']
+    cases = [client.Case(id=i, custom_report_label=x)
+             for i, x in enumerate(labels * 2)]
+    template_mapper.xunit_name_template = template
+    for methodname in ['test_a[(12345)]', 'test_a', 'test_b[a,b]',
+                       'test_c[(54321)]', 'a,b', '[12345]', 'test_x[(1)]',
+                       'test[id-2390f766-836d-40ef-9aeb-e810d78207fb]']:
+        xunit_case = xunitparser.TestCase(classname='a.b.C',
+                                          methodname=methodname)
+        try:
+            xunit_id = template_mapper.get_xunit_id(xunit_case)
+        except utils.NoneValueException:
+            continue
+        expected = _linear_suitable_cases(template_mapper, xunit_id, cases)
+        result = template_mapper.get_suitable_cases(xunit_case, cases)
+        assert [x.id for x in result] == [x.id for x in expected]
+
+
+def test_index_is_rebuilt_for_other_cases(template_mapper):
+    from xunit2testrail.vendor import xunitparser
+    xunit_case = xunitparser.TestCase(classname='a.b.C',
+                                      methodname='test_a[(12345)]')
+    cases = [client.Case(id=1, custom_report_label='12345')]
+    assert len(template_mapper.get_suitable_cases(xunit_case, cases)) == 1
+    cases.append(client.Case(id=2, custom_report_label='12345'))
+    assert len(template_mapper.get_suitable_cases(xunit_case, cases)) == 2
+    other_cases = [client.Case(id=3, custom_report_label='1')]
+    assert template_mapper.get_suitable_cases(xunit_case, other_cases) == []
+
+
+def test_testrail_keys(template_mapper, mocker):
+    template_mapper.testrail_name_template = '{title}/{custom_report_label}'
+    assert template_mapper.get_template_fields() == ['title',
+                                                     'custom_report_label']
+    cases = [client.Case(id=1, title='a', custom_report_label='1'),
+             client.Case(id=2, title='b', custom_report_label='2',
+                         refs='c')]
+    get_field = mocker.spy(client.Case, 'get_field')
+    assert template_mapper.get_testrail_keys(cases) == ['a/1', 'b/2']
+    assert template_mapper.get_testrail_keys(cases) == ['a/1', 'b/2']
+    # only template fields are read, once per case
+    assert get_field.call_count == 4
+
+
+def test_testrail_keys_missing_field(template_mapper):
+    template_mapper.testrail_name_template = '{title.upper}'
+    assert template_mapper.get_template_fields() == ['title']
+    with pytest.raises(KeyError):
+        template_mapper.get_testrail_keys([client.Case(id=1, title=None)])
+
+
 def test_empty_xunit_id(template_mapper, caplog):
     from xunit2testrail.vendor import xunitparser
     xunit_case = xunitparser.TestCase(classname='a.b.C', methodname='test_e[1]')
@@ -205,6 +281,35 @@ def test_no_testrail_case_logging(caplog, template_mapper, suite, milestone):
     assert expected in caplog.text
 
 
+@pytest.mark.parametrize('threshold, expected', (
+    (None, {}),
+    (0.5, {'test_create_server': 'test_create_server_new'}),
+    (0.99, {}),
+))
+def test_map_similar_cases(template_mapper, suite, milestone, threshold,
+                           expected):
+    from xunit2testrail.vendor import xunitparser
+    template_mapper.xunit_name_template = u'{methodname}'
+    template_mapper.testrail_name_template = u'{custom_report_label}'
+    template_mapper.suggest_count = 2
+    template_mapper.auto_map_threshold = threshold
+    xunit_case = xunitparser.TestCase(classname='a.b.C',
+                                      methodname='test_create_server_new')
+    testrail_cases = [
+        client.Case(id=i, custom_report_label=x, title=x)
+        for i, x in enumerate(['test_delete_server', 'test_create_server',
+                               'test_list_images'])]
+    result = template_mapper.map(xunitparser.TestSuite([xunit_case]),
+                                 testrail_cases, suite, milestone.id)
+    check_mapping(result, expected)
+    if expected:
+        assert template_mapper.suggestions == []
+    else:
+        [(case, candidates)] = template_mapper.suggestions
+        assert case is xunit_case
+        assert [x.id for _, x in candidates] == [1, 0]
+
+
 @pytest.mark.parametrize('banner, text, max_length, expected',
                          (
                           ('foo\n', 'bar and bar', 15, 'foo\nbar and bar'),
@@ -212,3 +317,50 @@ def test_no_testrail_case_logging(caplog, template_mapper, suite, milestone):
                           ))
 def test_truncate_head(banner, text, max_length, expected):
     assert utils.truncate_head(banner, text, max_length) == expected
+
+
+@pytest.fixture
+def id_mapper():
+    return utils.IdCaseMapper(
+        xunit_name_template=u'{id}',
+        testrail_name_template=u'{custom_report_label}',
+        testrail_uuid_field='custom_uuid')
+
+
+@pytest.mark.parametrize('methodname, report_id, properties, expected', (
+    ('test_a', None, {'testrail_case_id': 'C12345'}, 12345),
+    ('test_a[(54321)]', None, {'testrail_case_id': '12345'}, 12345),
+    ('test_a', '12345', None, 12345),
+    ('test_a[(12345)]', None, None, 12345),
+    ('test_a', 'label', {'other': '1'}, None),
+))
+def test_xunit_case_id(id_mapper, methodname, report_id, properties,
+                       expected):
+    from xunit2testrail.vendor import xunitparser
+    xunit_case = xunitparser.TestCase(classname='a.b.C',
+                                      methodname=methodname, id=report_id)
+    xunit_case.properties = properties
+    assert id_mapper.get_xunit_case_id(xunit_case) == expected
+
+
+def test_id_mapper(id_mapper):
+    from xunit2testrail.vendor import xunitparser
+    uuid = '2390f766-836d-40ef-9aeb-e810d78207fb'
+    cases = [
+        client.Case(id=12345, custom_report_label='1'),
+        client.Case(id=2, custom_report_label='(54321)'),
+        client.Case(id=3, custom_report_label='', custom_uuid=uuid.upper()),
+        client.Case(id=4, custom_report_label='', custom_uuid='not uuid'),
+    ]
+
+    def match(methodname):
+        xunit_case = xunitparser.TestCase(classname='a.b.C',
+                                          methodname=methodname)
+        return [x.id for x in id_mapper.get_suitable_cases(xunit_case,
+                                                           cases)]
+
+    assert match('test_a[(12345)]') == [12345]
+    # unknown case id, matched by template
+    assert match('test_a[(54321)]') == [2]
+    assert match('test_b[id-{}]'.format(uuid)) == [3]
+    assert match('test_c') == []
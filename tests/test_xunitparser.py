@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+from datetime import timedelta
+
+import pytest
+
+from xunit2testrail.vendor import xunitparser
+
+
+@pytest.mark.parametrize('value, expected', (
+    (None, None),
+    ('0', timedelta(0)),
+    ('1.5', timedelta(seconds=1.5)),
+    ('0.001', timedelta(milliseconds=1)),
+    (' 2.25 ', timedelta(seconds=2.25)),
+    ('1e-3', timedelta(milliseconds=1)),
+    ('nan', None),
+    ('3s', timedelta(seconds=3)),
+    ('1.5 s', timedelta(seconds=1.5)),
+    ('.5s', timedelta(seconds=0.5)),
+    ('12ms', timedelta(milliseconds=12)),
+    ('12.5ms', timedelta(microseconds=12500)),
+    ('350us', timedelta(microseconds=350)),
+    (u'350µs', timedelta(microseconds=350)),
+    (u'350μs', timedelta(microseconds=350)),
+    ('1500ns', timedelta(microseconds=1.5)),
+    ('2m', timedelta(minutes=2)),
+    ('1m2.5s', timedelta(minutes=1, seconds=2.5)),
+    ('1h2m3s', timedelta(hours=1, minutes=2, seconds=3)),
+    ('1s500ms', timedelta(seconds=1.5)),
+))
+def test_to_timedelta(value, expected):
+    assert xunitparser.to_timedelta(value) == expected
+    # cached result
+    assert xunitparser.to_timedelta(value) == expected
+
+
+@pytest.mark.parametrize('value', ['', 'abc', '1x', '1.5sec', 's', '1s2'])
+def test_to_timedelta_error(value):
+    with pytest.raises(Exception, match='Cannot parse time field'):
+        xunitparser.to_timedelta(value)
+
+
+def test_to_timedelta_cache_is_bounded(mocker):
+    mocker.patch.object(xunitparser, '_timedelta_cache_size', 10)
+    mocker.patch.object(xunitparser, '_timedelta_cache', {})
+    for i in range(25):
+        xunitparser.to_timedelta(str(i))
+    assert len(xunitparser._timedelta_cache) <= 10
+
+
+def test_close_reports(tmpdir):
+    report = tmpdir.join('report.xml')
+    report.write(b'<testsuite><testcase classname="a.B" name="t1">'
+                 b'<system-out>out</system-out></testcase>'
+                 b'<testcase name="t2"/></testsuite>', mode='wb')
+    cases = list(xunitparser.iterparse_lazy(str(report)))
+    mapped = cases[0].get_payload('stdout').report
+    xunitparser.close_reports(cases)
+    assert mapped.data.closed
+    with pytest.raises(ValueError):
+        cases[0].stdout
+
+    with xunitparser.MappedReport(str(report)) as mapped:
+        assert mapped.decode(1, 10) == u'testsuite'
+    assert mapped.data.closed
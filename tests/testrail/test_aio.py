@@ -0,0 +1,63 @@
+import pytest
+
+from xunit2testrail.testrail.aio import AsyncClient
+from xunit2testrail.testrail.aio import AsyncCollection
+from xunit2testrail.testrail.aio import AsyncItem
+from xunit2testrail.testrail.aio import run
+from xunit2testrail.testrail.client import Case
+from xunit2testrail.testrail.client import Project
+from xunit2testrail.testrail.client import Suite
+
+
+@pytest.fixture
+def aclient(client):
+    aclient = AsyncClient(client, concurrency=4)
+    yield aclient
+    aclient.close()
+
+
+def test_projects(aclient):
+    projects = run(aclient.projects())
+    assert isinstance(projects[0], AsyncItem)
+    assert isinstance(projects[0].unwrap(), Project)
+
+
+def test_item_collections(aclient):
+    project = run(aclient.projects.find(id=1))
+    assert isinstance(project.suites, AsyncCollection)
+    suite = run(project.suites.get(2))
+    assert isinstance(suite.unwrap(), Suite)
+    assert suite.project_id == project.id
+
+
+def test_compact_items_are_wrapped(aclient):
+    project = run(aclient.projects.get(1))
+    suite = run(project.suites.get(2))
+    cases = run(suite.cases())
+    assert isinstance(cases[0], AsyncItem)
+    assert isinstance(cases[0].unwrap(), Case)
+
+
+def test_gather(aclient):
+    project = run(aclient.projects.get(1))
+    suites, milestones, configs = run(
+        project.suites(), project.milestones(), project.configs())
+    assert suites[0].id == 2
+    assert milestones[0].id == 8
+    assert configs[0].id == 9
+
+
+def test_awaitable_methods(aclient):
+    project = run(aclient.projects.get(1))
+    suite = run(project.suites.get(2))
+    fields = run(suite.get_custom_case_fields())
+    assert fields[0]['name'] == 'qa_team'
+
+
+def test_statuses(aclient):
+    assert 'passed' in run(aclient.get_statuses()).values()
+
+
+def test_run_doesnt_wrap(aclient, client):
+    projects = run(aclient.run(client.projects))
+    assert isinstance(projects[0], Project)
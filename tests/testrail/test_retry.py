@@ -0,0 +1,69 @@
+import pytest
+
+from xunit2testrail.testrail.retry import RetryPolicy
+
+
+class FakeResponse(object):
+    def __init__(self, status_code, headers=None):
+        self.status_code = status_code
+        self.headers = headers or {}
+
+
+@pytest.mark.parametrize('status, retryable', (
+    (429, True),
+    (502, True),
+    (400, False),
+    (403, False),
+    (404, False),
+    (302, False), ))
+def test_retryable_statuses(status, retryable):
+    policy = RetryPolicy()
+    delay = policy.get_delay(1, FakeResponse(status), elapsed=0)
+    assert (delay is not None) == retryable
+
+
+def test_connection_error_is_retryable():
+    assert RetryPolicy().get_delay(1, None, elapsed=0) is not None
+
+
+def test_backoff_grows_exponentially():
+    policy = RetryPolicy(max_attempts=10, rules={500: 0.5})
+    delays = [policy.get_delay(attempt, FakeResponse(500), elapsed=0)
+              for attempt in range(1, 6)]
+    assert delays[0] < 1
+    for attempt, delay in enumerate(delays, 1):
+        upper = 0.5 * 2 ** (attempt - 1)
+        assert upper / 2 <= delay <= upper
+
+
+def test_max_delay():
+    policy = RetryPolicy(max_attempts=100, max_delay=3)
+    assert policy.get_delay(50, FakeResponse(500), elapsed=0) <= 3
+
+
+def test_max_attempts():
+    policy = RetryPolicy(max_attempts=3)
+    assert policy.get_delay(2, FakeResponse(503), elapsed=0) is not None
+    assert policy.get_delay(3, FakeResponse(503), elapsed=0) is None
+
+
+def test_attempts_are_limited_by_budget():
+    policy = RetryPolicy(budget=3200)
+    assert policy.get_delay(1000, FakeResponse(503), elapsed=2000) is not None
+    assert policy.get_delay(1000, FakeResponse(503), elapsed=3200) is None
+
+
+def test_budget():
+    policy = RetryPolicy(budget=10)
+    response = FakeResponse(429, {'Retry-After': '5'})
+    assert policy.get_delay(1, response, elapsed=4) == 5
+    assert policy.get_delay(1, response, elapsed=6) is None
+
+
+@pytest.mark.parametrize('value, expected', (
+    ('3', 3),
+    ('Wed, 21 Oct 2015 07:28:00 GMT', 0),
+    ('garbage', None), ))
+def test_retry_after(value, expected):
+    response = FakeResponse(429, {'Retry-After': value})
+    assert RetryPolicy.get_retry_after(response) == expected
@@ -0,0 +1,85 @@
+import re
+
+import pytest
+
+from xunit2testrail.testrail.snapshot import SuiteSnapshot
+
+
+@pytest.fixture
+def server_cases(api_mock, client):
+    cases = {
+        3: {'id': 3, 'suite_id': 2, 'title': 'case 3', 'updated_on': 100},
+        4: {'id': 4, 'suite_id': 2, 'title': 'case 4', 'updated_on': 200},
+    }
+
+    def callback(request, context):
+        updated_after = int(request.qs.get('updated_after', [0])[0])
+        return [x for x in cases.values() if x['updated_on'] > updated_after]
+
+    api_mock.register_uri(
+        'GET', re.compile(re.escape(client.base_url) + r'get_cases/.*'),
+        json=callback)
+    return cases
+
+
+@pytest.fixture
+def snapshot(tmpdir, suite):
+    return SuiteSnapshot(suite, str(tmpdir), server='http://testrail/')
+
+
+def test_first_sync_fetches_all(snapshot, server_cases, api_mock):
+    cases = snapshot.sync()
+    assert [x.title for x in cases] == ['case 3', 'case 4']
+    assert 'updated_after' not in api_mock.last_request.qs
+
+
+def test_delta_sync(snapshot, server_cases, api_mock):
+    snapshot.sync()
+    server_cases[4]['title'] = 'case 4 new'
+    server_cases[4]['updated_on'] = 300
+    server_cases[5] = {'id': 5, 'suite_id': 2, 'title': 'case 5',
+                       'updated_on': 300}
+    cases = snapshot.sync()
+    assert api_mock.last_request.qs['updated_after'] == ['199']
+    assert [x.title for x in cases] == ['case 3', 'case 4 new', 'case 5']
+
+
+@pytest.mark.parametrize('change', ({'is_deleted': 1}, {'suite_id': 7}))
+def test_delta_sync_removes_cases(snapshot, server_cases, change):
+    snapshot.sync()
+    server_cases[3].update(change, updated_on=300)
+    assert [x.id for x in snapshot.sync()] == [4]
+
+
+def test_full_sync_interval(snapshot, server_cases, api_mock):
+    snapshot.full_sync_interval = 0
+    snapshot.sync()
+    del server_cases[3]
+    assert [x.id for x in snapshot.sync()] == [4]
+    assert 'updated_after' not in api_mock.last_request.qs
+
+
+def test_invalidate(snapshot, server_cases, api_mock):
+    snapshot.sync()
+    del server_cases[3]
+    snapshot.invalidate()
+    assert [x.id for x in snapshot.sync()] == [4]
+    assert 'updated_after' not in api_mock.last_request.qs
+    snapshot.invalidate()
+    snapshot.invalidate()
+
+
+def test_broken_snapshot(snapshot, server_cases):
+    with open(snapshot.path, 'w') as f:
+        f.write('{')
+    assert len(snapshot.sync()) == 2
+
+
+def test_sync_fields(snapshot, server_cases):
+    server_cases[3]['custom_steps'] = 'long text'
+    snapshot.fields = ('title',)
+    cases = snapshot.sync()
+    assert cases[0].data == {'title': 'case 3'}
+    # file keeps whole data for other fields sets
+    snapshot.fields = None
+    assert snapshot.sync()[0].custom_steps == 'long text'
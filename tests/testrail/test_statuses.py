@@ -0,0 +1,40 @@
+import pytest
+
+from xunit2testrail.testrail.statuses import StatusResolver
+
+STATUSES = [
+    {'id': 1, 'name': 'passed', 'label': 'Passed'},
+    {'id': 2, 'name': 'blocked', 'label': 'Blocked'},
+    {'id': 5, 'name': 'failed', 'label': 'Failed'},
+    {'id': 6, 'name': 'custom_status1', 'label': 'Product Bug'},
+]
+
+
+@pytest.mark.parametrize('outcome, expected', (
+    ('success', 1),
+    ('failure', 5),
+    ('error', 2),
+    ('skipped', None),
+    ('unknown', None), ))
+def test_default_outcomes(outcome, expected):
+    assert StatusResolver(STATUSES).resolve(outcome) == expected
+
+
+@pytest.mark.parametrize('status', ('custom_status1', 'product bug', 6, '6'))
+def test_custom_outcomes(status):
+    resolver = StatusResolver(STATUSES, {'error': status})
+    assert resolver.resolve('error') == 6
+    assert resolver.resolve('failure') == 5
+
+
+def test_id_name_dict():
+    resolver = StatusResolver({1: 'passed', 2: 'skipped'})
+    assert resolver.resolve('skipped') == 2
+    assert resolver.get_name(1) == 'passed'
+    assert resolver.get_id('PASSED') == 1
+
+
+def test_client_fetches_statuses_once(client, api_mock):
+    client.statuses
+    client.get_statuses()
+    assert api_mock.call_count == 1
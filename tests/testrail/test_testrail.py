@@ -1,9 +1,15 @@
+from concurrent.futures import ThreadPoolExecutor
 import pytest
 import re
 
+import requests
+
+from xunit2testrail.testrail.client import BaseItem
 from xunit2testrail.testrail.client import Case
 from xunit2testrail.testrail.client import Client
 from xunit2testrail.testrail.client import Config
+from xunit2testrail.testrail.client import Item
+from xunit2testrail.testrail.client import ItemSet
 from xunit2testrail.testrail.client import Milestone
 from xunit2testrail.testrail.client import Plan
 from xunit2testrail.testrail.client import Project
@@ -12,6 +18,7 @@ from xunit2testrail.testrail.client import Run
 from xunit2testrail.testrail.client import Test as TrTest
 from xunit2testrail.testrail.client import Suite
 from xunit2testrail.testrail.exceptions import NotFound
+from xunit2testrail.testrail.exceptions import UploadError
 
 
 def test_projects(client):
@@ -342,6 +349,23 @@ def test_add_results_for_cases(api_mock, client, suite, run):
     assert new_results[0].id == 5
 
 
+def test_add_results_for_cases_failed_update(api_mock, client, suite, run):
+    base = re.escape(client.base_url)
+
+    api_mock.register_uri(
+        'POST',
+        re.compile(base + r'update_run/.*'),
+        status_code=400,
+        json={'error': 'Field :case_ids contains invalid case IDs'},
+        complete_qs=True)
+    cases = suite.cases()
+    case_ids = run.get_case_ids()
+    with pytest.raises(Exception):
+        run.add_results_for_cases(cases)
+    assert run.get_case_ids() == case_ids
+    assert cases[0].id not in case_ids
+
+
 @pytest.mark.parametrize('statuses', (
     [200],
     [429, 200],
@@ -366,3 +390,325 @@ def test_http_errors(api_mock, mocker, statuses):
 
     mocker.patch('time.sleep')
     client.projects()
+
+
+def test_requests_share_session(api_mock, client, mocker):
+    send = mocker.spy(client.session, 'send')
+    client.projects()
+    client.projects(id=1)
+    assert send.call_count == 2
+    assert api_mock.request_history[-1].timeout == client.timeout
+
+
+def test_client_timeouts(api_mock):
+    client = Client(base_url='http://testrail/', username='user',
+                    password='password', connect_timeout=3, read_timeout=30)
+    api_mock.register_uri('GET', re.compile(re.escape(client.base_url)),
+                          json=[])
+    client.projects()
+    assert api_mock.request_history[-1].timeout == (3, 30)
+    assert client.session.auth == ('user', 'password')
+
+
+def test_clients_are_independent(api_mock):
+    clients = [Client(base_url='http://testrail{}/'.format(x),
+                      username='user{}'.format(x), password='password')
+               for x in range(2)]
+    for x, client in enumerate(clients):
+        api_mock.register_uri(
+            'GET', client.base_url + 'get_project/1',
+            json={'id': 1, 'name': 'project {}'.format(x)})
+        api_mock.register_uri(
+            'GET', client.base_url + 'get_suites/1',
+            json=[{'id': 2, 'project_id': 1, 'name': 'suite {}'.format(x)}])
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        projects = list(executor.map(lambda c: c.projects.get(1), clients))
+    suites = [p.suites.find(id=2) for p in projects]
+
+    assert [p.name for p in projects] == ['project 0', 'project 1']
+    assert [s.name for s in suites] == ['suite 0', 'suite 1']
+    assert [s._client for s in suites] == clients
+    assert [x.headers['Authorization'] for x in api_mock.request_history
+            if 'testrail1' in x.url] == [
+        requests.auth._basic_auth_str('user1', 'password')] * 2
+
+
+def test_unbound_item_request():
+    with pytest.raises(ValueError):
+        Run(id=1, name='run').tests()
+
+
+def _register_statuses(api_mock, statuses, headers=None):
+    def request_callback(request, context):
+        context.status_code = statuses.pop(0)
+        context.headers.update(headers or {})
+        return "[]"
+
+    url = re.escape('http://testrail/index.php?/api/v2/get_projects')
+    api_mock.register_uri(
+        'GET', re.compile(url), text=request_callback, complete_qs=True)
+
+
+def test_retry_after_header(api_mock, mocker):
+    client = Client(
+        base_url='http://testrail/', username='user', password='password')
+    _register_statuses(api_mock, [429, 200], headers={'Retry-After': '2'})
+    sleep = mocker.patch('time.sleep')
+    client.projects()
+    sleep.assert_called_once_with(2.0)
+
+
+def test_no_retry_on_client_error(api_mock, mocker):
+    client = Client(
+        base_url='http://testrail/', username='user', password='password')
+    _register_statuses(api_mock, [403, 200])
+    sleep = mocker.patch('time.sleep')
+    with pytest.raises(requests.HTTPError):
+        client.projects()
+    assert api_mock.call_count == 1
+    assert not sleep.called
+
+
+@pytest.mark.parametrize('method, error, retried', (
+    ('GET', requests.ReadTimeout, True),
+    ('GET', requests.ConnectTimeout, True),
+    ('POST', requests.ConnectTimeout, True),
+    ('POST', requests.ConnectionError, True),
+    ('POST', requests.ReadTimeout, False), ))
+def test_timeout_retries(api_mock, mocker, method, error, retried):
+    client = Client(
+        base_url='http://testrail/', username='user', password='password')
+    responses = [{'exc': error}, {'text': '[]'}]
+    api_mock.register_uri(method, re.compile('http://testrail/'), responses)
+    mocker.patch('time.sleep')
+    if retried:
+        client._query(method, 'add_case/1')
+    else:
+        with pytest.raises(error):
+            client._query(method, 'add_case/1')
+    assert api_mock.call_count == (2 if retried else 1)
+
+
+def test_retry_stops_after_budget(api_mock, mocker):
+    client = Client(
+        base_url='http://testrail/', username='user', password='password',
+        request_timeout=5)
+    _register_statuses(api_mock, [429, 200], headers={'Retry-After': '10'})
+    with pytest.raises(requests.HTTPError):
+        client.projects()
+    assert api_mock.call_count == 1
+
+
+@pytest.fixture
+def paginated_cases(api_mock, client):
+    base = re.escape(client.base_url)
+    pages = {
+        0: {'offset': 0, 'limit': 2, 'size': 2,
+            '_links': {'next': '/api/v2/get_cases/1&suite_id=2&offset=2',
+                       'prev': None},
+            'cases': [{'id': 1, 'title': 'a'}, {'id': 2, 'title': 'b'}]},
+        2: {'offset': 2, 'limit': 2, 'size': 1,
+            '_links': {'next': None,
+                       'prev': '/api/v2/get_cases/1&suite_id=2&offset=0'},
+            'cases': [{'id': 3, 'title': 'c'}]},
+    }
+
+    def callback(request, context):
+        offset = int(request.qs.get('offset', [0])[0])
+        return pages[offset]
+
+    api_mock.register_uri(
+        'GET', re.compile(base + r'get_cases/1&suite_id=2.*'), json=callback)
+
+
+@pytest.mark.parametrize('prefetch', [False, True])
+def test_paginated_iter(suite, paginated_cases, prefetch):
+    cases = suite.cases.iter(prefetch=prefetch)
+    assert not isinstance(cases, list)
+    assert [x.title for x in cases] == ['a', 'b', 'c']
+
+
+def test_paginated_list(suite, paginated_cases, api_mock):
+    cases = suite.cases()
+    assert [x.id for x in cases] == [1, 2, 3]
+    assert cases.find(title='c').id == 3
+    assert api_mock.request_history[-1].qs['offset'] == ['2']
+
+
+def _results_cases(count):
+    cases = [Case(id=x, title='case {}'.format(x)) for x in range(count)]
+    for case in cases:
+        case.add_result(status_id=1)
+    return cases
+
+
+def test_add_results_for_cases_chunked(api_mock, client, run):
+    base = re.escape(client.base_url)
+
+    def callback(request, context):
+        return [{'id': x['case_id'], 'status_id': 1}
+                for x in request.json()['results']]
+
+    api_mock.register_uri(
+        'POST', re.compile(base + r'add_results_for_cases/.*'), json=callback)
+    results = run.results.add_for_cases(run.id, _results_cases(5),
+                                        chunk_size=2, workers=3)
+    sent = [x.json()['results'] for x in api_mock.request_history
+            if x.method == 'POST']
+    assert sorted(len(x) for x in sent) == [1, 2, 2]
+    assert [x.id for x in results] == [0, 1, 2, 3, 4]
+
+
+def test_add_results_for_cases_failed_chunk(api_mock, client, run, mocker):
+    base = re.escape(client.base_url)
+    mocker.patch('time.sleep')
+
+    def callback(request, context):
+        results = request.json()['results']
+        if results[0]['case_id'] == 2:
+            context.status_code = 400
+        return [{'id': x['case_id'], 'status_id': 1} for x in results]
+
+    api_mock.register_uri(
+        'POST', re.compile(base + r'add_results_for_cases/.*'), json=callback)
+    with pytest.raises(UploadError) as e:
+        run.results.add_for_cases(run.id, _results_cases(5), chunk_size=2)
+    assert [x.id for x in e.value.results] == [0, 1, 4]
+    assert len(e.value.failed_chunks) == 1
+    assert [x['case_id'] for x in e.value.failed_chunks[0][0]] == [2, 3]
+
+
+def test_item_set_index():
+    runs = ItemSet(Run(id=x, name='run {}'.format(x % 3), suite_id=2,
+                       config_ids=[x % 2]) for x in range(10))
+    # the first lookup scans, the next one builds index
+    for _ in range(2):
+        found = runs.find_all(name='run 1', suite_id=2, config_ids=[0])
+        assert [x.id for x in found] == [4]
+        assert [x.id for x in runs.find_all(name='run 0')] == [0, 3, 6, 9]
+        assert runs.find_all(config_ids=(0,)) == []
+    assert len(runs._indexes) == 3
+    assert all(isinstance(x, tuple) for x in runs._indexes.values())
+
+
+def test_item_set_index_partial_items(mocker):
+    plan = Plan(id=1, name='plan', entries=[{'id': 'e', 'suite_id': 2, 'runs': [
+        {'id': 3, 'name': 'a'}, {'id': 4, 'name': 'b', 'config_ids': [5]}]}])
+    plan._client = mocker.Mock()
+    runs = plan.runs
+    assert plan.runs is runs
+    for _ in range(2):
+        assert runs.find(name='b', config_ids=[5]).id == 4
+        assert runs.find(id=4).name == 'b'
+    # partial run without config_ids is not fetched to be indexed
+    assert runs._indexes[('config_ids', 'name')][1] == [0]
+    assert not plan._client._query.called
+
+
+def test_item_set_index_invalidation():
+    runs = ItemSet([Run(id=1, name='a')])
+    assert runs.find_all(name='b') == []
+    runs.append(Run(id=2, name='b'))
+    assert runs.find(name='b').id == 2
+    runs[0] = Run(id=3, name='b')
+    assert [x.id for x in runs.find_all(name='b')] == [3, 2]
+    del runs[1]
+    assert [x.id for x in runs.find_all(name='b')] == [3]
+
+
+def test_item_set_unhashable_values():
+    runs = ItemSet([Run(id=1, name='a', tags={1, 2}), Run(id=2, name='b')])
+    assert runs.find(tags={1, 2}).id == 1
+    assert runs.find(name='b').id == 2
+
+
+def test_plain_item():
+    item = Item(id=1, name='a')
+    item.title = 'b'
+    assert item.data == {'name': 'a', 'title': 'b'}
+    assert item.get_field('title') == 'b'
+
+
+def test_compact_item():
+    case = Case(id=1, title='title', suite_id=2, custom_report_label='12345')
+    assert not hasattr(case, '__dict__')
+    assert isinstance(case, BaseItem)
+    assert not isinstance(case, Item)
+    assert case.title == 'title'
+    assert case.custom_report_label == '12345'
+    case.custom_report_label = '54321'
+    case.section_id = 3
+    assert case.data == {'title': 'title', 'suite_id': 2, 'section_id': 3,
+                         'custom_report_label': '54321'}
+    with pytest.raises(AttributeError):
+        case.refs
+
+
+def test_collection_fields_projection(suite):
+    cases = suite.cases
+    cases.fields = ('title',)
+    case = cases()[0]
+    assert case.id == 3
+    assert case.data == {'title': 'case title'}
+
+
+def test_plan_runs_without_requests(api_mock, project):
+    plan = project.plans.get(8)
+    requests_count = api_mock.call_count
+    run = plan.runs.find(name='some test run', config_ids=[9])
+    assert run.id == 13
+    assert run.plan_id == 8
+    assert run.entry_id == 12
+    assert api_mock.call_count == requests_count
+
+
+def test_plan_run_lazy_details(api_mock, project):
+    plan = project.plans.get(8)
+    run = plan.runs[0]
+    requests_count = api_mock.call_count
+    assert run.suite_id == 2
+    assert run.milestone_id == 8
+    assert api_mock.call_count == requests_count + 1
+    assert run.name == 'some test run'
+
+
+def test_add_results_to_plan_run_reuses_data(api_mock, client, project,
+                                            suite):
+    base = re.escape(client.base_url)
+    api_mock.register_uri(
+        'POST', re.compile(base + r'update_plan_entry/8/12'),
+        json={'id': 12, 'runs': []})
+    api_mock.register_uri(
+        'POST', re.compile(base + r'add_results_for_cases/13'),
+        json=[{'id': 5, 'status_id': 1}])
+    plan = project.plans.get(8)
+    run = plan.runs.find(name='some test run')
+    cases = suite.cases()
+    for case in cases:
+        case.add_result(status_id=1)
+    history_len = len(api_mock.request_history)
+
+    run.add_results_for_cases(cases)
+    run.add_results_for_cases(cases)
+
+    urls = [x.url.split('/api/v2/')[-1]
+            for x in api_mock.request_history[history_len:]]
+    assert not [x for x in urls if x.startswith('get_plan')]
+    assert len([x for x in urls if x.startswith('get_tests/13')]) == 1
+    assert urls[-3:] == ['update_plan_entry/8/12', 'add_results_for_cases/13',
+                         'add_results_for_cases/13']
+    assert set(api_mock.request_history[-3].json()['case_ids']) == {3, 5, 31}
+
+
+def test_new_plan_run_case_ids(api_mock, client, plan):
+    api_mock.register_uri(
+        'POST', re.compile(re.escape(client.base_url) + r'add_plan_entry/.*'),
+        json={'id': 20, 'runs': [{'id': 8, 'config_ids': []}]})
+    run = Run(suite_id=14, name="test_run", case_ids=[1, 2])
+    plan.add_run(run)
+    requests_count = api_mock.call_count
+    assert run.get_case_ids() == {1, 2}
+    assert run.plan_id == plan.id
+    assert plan.runs.find(id=8).entry_id == 20
+    assert api_mock.call_count == requests_count
@@ -1,7 +1,8 @@
 from xunit2testrail.reporter import Reporter
+from xunit2testrail.utils import IdCaseMapper
 from xunit2testrail.utils import TemplateCaseMapper
 
 __VERSION__ = '0.7.3'
 
 
-__all__ = ['TemplateCaseMapper', 'Reporter', '__VERSION__']
+__all__ = ['IdCaseMapper', 'TemplateCaseMapper', 'Reporter', '__VERSION__']
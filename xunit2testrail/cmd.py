@@ -2,6 +2,7 @@
 
 import argparse
 import functools
+import glob
 import json
 import logging
 import os
@@ -11,7 +12,9 @@ import traceback
 import warnings
 
 import prettytable
+import requests
 
+from xunit2testrail import IdCaseMapper
 from xunit2testrail import TemplateCaseMapper
 from xunit2testrail import Reporter
 
@@ -34,36 +37,85 @@ def filename(string):
     return string
 
 
+def report_files(string):
+    """Return list of report files by file path, glob or directory."""
+    if os.path.isdir(string):
+        files = []
+        for root, _, names in os.walk(string):
+            files.extend(os.path.join(root, x) for x in names
+                         if x.endswith('.xml'))
+        if not files:
+            msg = "%r has no .xml files" % string
+            raise argparse.ArgumentTypeError(msg)
+        return sorted(files)
+    if glob.has_magic(string):
+        files = sorted(x for x in glob.glob(string) if os.path.isfile(x))
+        if not files:
+            msg = "%r matches no files" % string
+            raise argparse.ArgumentTypeError(msg)
+        return files
+    return [filename(string)]
+
+
 def parse_args(args):
     defaults = {
         'TESTRAIL_URL': 'https://mirantis.testrail.com',
         'TESTRAIL_USER': 'user@example.com',
         'TESTRAIL_PASSWORD': 'password',
         'TESTRAIL_REQUEST_TIMEOUT': 3200,
+        'TESTRAIL_CONNECT_TIMEOUT': 10,
+        'TESTRAIL_READ_TIMEOUT': 120,
+        'TESTRAIL_POOL_SIZE': 10,
+        'TESTRAIL_MAX_ATTEMPTS': None,
+        'TESTRAIL_CONCURRENCY': 4,
+        'TESTRAIL_RESULTS_CHUNK_SIZE': 500,
         'TESTRAIL_PROJECT': 'Mirantis OpenStack',
         'TESTRAIL_MILESTONE': '9.0',
         'TESTRAIL_TEST_SUITE': '[{0.testrail_milestone}] MOSQA',
         'TESTRAIL_CASE_CUSTOM_FIELDS': {"custom_qa_team": "9", },
         'TESTRAIL_CASE_SECTION_NAME': 'All',
+        'TESTRAIL_STATUS_MAP': {},
         'TESTRAIL_CONFIGURATION_NAME': None,
         'TESTRAIL_CASE_MAX_NAME_LENGHT': 0,
-        'XUNIT_REPORT': 'report.xml',
+        'DUPLICATES_POLICY': 'last-wins',
+        'PARSE_WORKERS': None,
         'XUNIT_NAME_TEMPLATE': '{id}',
         'TESTRAIL_NAME_TEMPLATE': '{custom_report_label}',
+        'CASE_MAPPER': 'template',
+        'TESTRAIL_UUID_FIELD': None,
+        'SUGGEST_COUNT': 3,
+        'AUTO_MAP_THRESHOLD': None,
         'ISO_ID': None,
         'TESTRAIL_PLAN_NAME': None,
         'ENV_DESCRIPTION': '',
         'TEST_RESULTS_LINK': '',
         'PASTE_BASE_URL': None,
+        'PASTE_WORKERS': 8,
+        'PASTE_CACHE_TTL': 7 * 86400,
+        'COMMENT_FORMATTER': 'jinja',
+        'XUNIT2TESTRAIL_CACHE_DIR': None,
     }
     defaults = {k: os.environ.get(k, v) for k, v in defaults.items()}
 
     parser = argparse.ArgumentParser(description='xUnit to testrail reporter')
     parser.add_argument(
         'xunit_report',
-        type=filename,
-        default=defaults['XUNIT_REPORT'],
-        help='xUnit report XML file')
+        type=report_files,
+        nargs='+',
+        help=('xUnit report XML files, globs or directories with them, '
+              'reports are merged into one'))
+    parser.add_argument(
+        '--duplicates-policy',
+        choices=['last-wins', 'worst-wins'],
+        default=defaults['DUPLICATES_POLICY'],
+        help=('Which case to take if several reports have the same one: '
+              'from the last report or with the worst result'))
+    parser.add_argument(
+        '--parse-workers',
+        type=int,
+        default=defaults['PARSE_WORKERS'],
+        help=('Max number of processes to parse reports with '
+              '(default: number of CPUs)'))
 
     parser.add_argument(
         '--xunit-name-template',
@@ -75,6 +127,33 @@ def parse_args(args):
         type=str_cls,
         default=defaults['TESTRAIL_NAME_TEMPLATE'],
         help='template for TestRail cases to make id string')
+    parser.add_argument(
+        '--case-mapper',
+        choices=['template', 'id'],
+        default=defaults['CASE_MAPPER'],
+        help=('How to find TestRail cases: by templates or by TestRail case '
+              'ids, which xUnit cases carry (`testrail_case_id` property, '
+              '`id` attribute or `(12345)` in name), other cases are '
+              'matched by templates'))
+    parser.add_argument(
+        '--testrail-uuid-field',
+        type=str_cls,
+        default=defaults['TESTRAIL_UUID_FIELD'],
+        help=('TestRail case field with UUID to match `id-<uuid>` in xUnit '
+              'case names with (for --case-mapper id)'))
+    parser.add_argument(
+        '--suggest-count',
+        type=int,
+        default=defaults['SUGGEST_COUNT'],
+        help=('Number of TestRail cases with the most similar titles to show '
+              'for xUnit cases without matches (0 to disable)'))
+    parser.add_argument(
+        '--auto-map-threshold',
+        type=float,
+        default=defaults['AUTO_MAP_THRESHOLD'],
+        help=('Map xUnit cases without matches to the most similar TestRail '
+              'case, which is not mapped yet, if title similarity (from 0 '
+              'to 1) is at least this value'))
 
     parser.add_argument(
         '--env-description',
@@ -120,7 +199,39 @@ def parse_args(args):
         default=defaults['TESTRAIL_REQUEST_TIMEOUT'],
         help=('Timeout of waiting for a passed request to TestRail (HTTP status code < 300). '
               'Covers cases like HTTP-429 "API Rate Limit" or HTTP-409 "maintenance". '
-              'During this period, the request will be repeated with random intervals (from 300 to 600 sec)'))
+              'During this period, the request will be repeated with exponentially growing intervals '
+              '(or as server asks with Retry-After header)'))
+    parser.add_argument(
+        '--testrail-max-attempts',
+        type=int,
+        default=defaults['TESTRAIL_MAX_ATTEMPTS'],
+        help=('Max number of tries of a single request to TestRail '
+              '(default: not limited, only by --testrail-request-timeout)'))
+    parser.add_argument(
+        '--testrail-concurrency',
+        type=int,
+        default=defaults['TESTRAIL_CONCURRENCY'],
+        help='Max number of independent TestRail requests made at the same time')
+    parser.add_argument(
+        '--testrail-results-chunk-size',
+        type=int,
+        default=defaults['TESTRAIL_RESULTS_CHUNK_SIZE'],
+        help='Max number of results sent to TestRail in a single request (0 - no limit)')
+    parser.add_argument(
+        '--testrail-connect-timeout',
+        type=float,
+        default=defaults['TESTRAIL_CONNECT_TIMEOUT'],
+        help='Timeout (sec) of establishing a connection to TestRail')
+    parser.add_argument(
+        '--testrail-read-timeout',
+        type=float,
+        default=defaults['TESTRAIL_READ_TIMEOUT'],
+        help='Timeout (sec) of waiting for a TestRail response data')
+    parser.add_argument(
+        '--testrail-pool-size',
+        type=int,
+        default=defaults['TESTRAIL_POOL_SIZE'],
+        help='Number of keep-alive connections to TestRail kept in the pool')
     parser.add_argument(
         '--testrail-project',
         type=str_cls,
@@ -152,6 +263,14 @@ def parse_args(args):
         type=str_cls,
         default=defaults['TESTRAIL_CASE_SECTION_NAME'],
         help='Section name for *new* cases in the suite. Requires --testrail-add-missing-cases')
+    parser.add_argument(
+        '--testrail-status-map',
+        type=json.loads,
+        default=defaults['TESTRAIL_STATUS_MAP'],
+        help=('TestRail statuses for xUnit case results in JSON format, like '
+              '{"error": "failed"}. Results are success, failure, skipped and error '
+              '(default statuses are passed, failed, skipped and blocked). '
+              'Statuses may be set by name, label or ID'))
     parser.add_argument(
         '--testrail_configuration_name',
         type=str_cls,
@@ -179,12 +298,35 @@ def parse_args(args):
         default=defaults['PASTE_BASE_URL'],
         help=('pastebin service JSON API URL to send test case logs and trace,'
               ' example: http://localhost:5000/'))
+    parser.add_argument(
+        '--paste-workers',
+        type=int,
+        default=defaults['PASTE_WORKERS'],
+        help='Max number of test case logs uploaded to pastebin at the same time')
+    parser.add_argument(
+        '--paste-cache-ttl',
+        type=int,
+        default=defaults['PASTE_CACHE_TTL'],
+        help=('Seconds to reuse URLs of pastes with the same content from '
+              'previous runs (needs --cache-dir)'))
+    parser.add_argument(
+        '--comment-formatter',
+        choices=['jinja', 'fast'],
+        default=defaults['COMMENT_FORMATTER'],
+        help=('How to make TestRail result comments: render Jinja template or '
+              'use built-in formatter, which is faster for large reports'))
     parser.add_argument(
         '--testrail-run-update',
         dest='use_test_run_if_exists',
         action='store_true',
         default=False,
         help='don\'t create new test run if such already exists')
+    parser.add_argument(
+        '--cache-dir',
+        type=str_cls,
+        default=defaults['XUNIT2TESTRAIL_CACHE_DIR'],
+        help=('directory to keep local snapshots of TestRail suites in, '
+              'only changed cases are fetched if snapshot exists'))
     parser.add_argument(
         '--dry-run', '-n',
         action='store_true',
@@ -214,6 +356,44 @@ def print_mapping_table(mapping, wrap=60):
     print(pt)
 
 
+def print_suggestions_table(suggestions, wrap=60):
+    """Print TestRail cases similar to xUnit cases without matches."""
+    if not suggestions:
+        return
+    print('Similar TestRail cases for xUnit cases without matches:')
+    pt = prettytable.PrettyTable(
+        field_names=['Xunit case', 'ID', 'Title', 'Similarity'])
+    pt.align = 'l'
+    wrapper = functools.partial(
+        textwrap.fill, width=wrap, break_long_words=False)
+    for xunit_case, candidates in suggestions:
+        xunit_str = wrapper('{0.methodname}\n({0.classname})'.format(
+            xunit_case))
+        for score, testrail_case in candidates or [(None, None)]:
+            if testrail_case is None:
+                pt.add_row([xunit_str, '', '', ''])
+            else:
+                pt.add_row([xunit_str, testrail_case.id,
+                            wrapper(testrail_case.title),
+                            '{:.2f}'.format(score)])
+            xunit_str = ''
+    print(pt)
+
+
+def send_results(reporter, mapping, args):
+    cases = reporter.fill_case_results(mapping)
+    if len(cases) == 0:
+        logger.warning('No cases matched, program will terminated')
+        return
+    plan = reporter.get_or_create_plan()
+    test_run = reporter.get_or_create_test_run(plan, cases)
+    test_run.add_results_for_cases(
+        cases,
+        chunk_size=args.testrail_results_chunk_size,
+        workers=args.testrail_concurrency)
+    reporter.print_run_url(test_run)
+
+
 def main(args=None):
 
     args = args or sys.argv[1:]
@@ -234,17 +414,29 @@ def main(args=None):
 
     logging.basicConfig(**logger_dict)
 
-    case_mapper = TemplateCaseMapper(
+    mapper_kwargs = dict(
         xunit_name_template=args.xunit_name_template,
         testrail_name_template=args.testrail_name_template,
-        testrail_case_max_name_lenght=args.testrail_case_max_name_lenght)
+        testrail_case_max_name_lenght=args.testrail_case_max_name_lenght,
+        suggest_count=args.suggest_count,
+        auto_map_threshold=args.auto_map_threshold)
+    if args.case_mapper == 'id':
+        case_mapper = IdCaseMapper(
+            testrail_uuid_field=args.testrail_uuid_field, **mapper_kwargs)
+    else:
+        case_mapper = TemplateCaseMapper(**mapper_kwargs)
 
     reporter = Reporter(
-        xunit_report=args.xunit_report,
+        xunit_report=[x for files in args.xunit_report for x in files],
         env_description=args.env_description,
         test_results_link=args.test_results_link,
         case_mapper=case_mapper,
-        paste_url=args.paste_url)
+        paste_url=args.paste_url,
+        paste_workers=args.paste_workers,
+        paste_cache_ttl=args.paste_cache_ttl,
+        comment_formatter=args.comment_formatter,
+        parse_workers=args.parse_workers,
+        duplicates_policy=args.duplicates_policy)
     suite = args.testrail_suite.format(args)
     reporter.config_testrail(
         base_url=args.testrail_url,
@@ -262,21 +454,32 @@ def main(args=None):
         testrail_case_section_name=args.testrail_case_section_name,
         testrail_configuration_name=args.testrail_configuration_name,
         dry_run=args.dry_run,
-        request_timeout=args.testrail_request_timeout)
-
-    xunit_suite, _ = reporter.get_xunit_test_suite()
-    mapping = reporter.map_cases(xunit_suite)
-    if not args.dry_run:
-        cases = reporter.fill_case_results(mapping)
-        if len(cases) == 0:
-            logger.warning('No cases matched, program will terminated')
-            return
-        plan = reporter.get_or_create_plan()
-        test_run = reporter.get_or_create_test_run(plan, cases)
-        test_run.add_results_for_cases(cases)
-        reporter.print_run_url(test_run)
-    else:
-        print_mapping_table(mapping)
+        request_timeout=args.testrail_request_timeout,
+        connect_timeout=args.testrail_connect_timeout,
+        read_timeout=args.testrail_read_timeout,
+        pool_size=args.testrail_pool_size,
+        max_attempts=args.testrail_max_attempts,
+        concurrency=args.testrail_concurrency,
+        cache_dir=args.cache_dir,
+        testrail_status_map=args.testrail_status_map)
+
+    with reporter:
+        mapping = reporter.map_cases(reporter.iter_xunit_cases())
+        if not args.dry_run:
+            try:
+                send_results(reporter, mapping, args)
+            except requests.HTTPError as e:
+                if not reporter.is_stale_cases_error(e):
+                    raise
+                logger.warning('TestRail rejected cases from suite '
+                               'snapshot, fetch all of them again: '
+                               '{}'.format(e))
+                reporter.resync_cases()
+                mapping = reporter.map_cases(reporter.iter_xunit_cases())
+                send_results(reporter, mapping, args)
+        else:
+            print_mapping_table(mapping)
+            print_suggestions_table(case_mapper.suggestions)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,31 @@
+from __future__ import absolute_import
+
+import six
+
+_missing = object()
+
+
+def indent_lines(text):
+    """Make markdown code block of text (indent each line by 4 spaces)."""
+    return u''.join(u'\n    {}\n'.format(line) for line in text.splitlines())
+
+
+def format_comment(xunit_case, env_description, jenkins_url, paste_url=None):
+    """Make TestRail comment for xUnit case without Jinja.
+
+    Output is the same as `testrail_comment.md` template renders.
+    """
+    message = getattr(xunit_case, 'message', _missing)
+    if message is _missing:
+        message = u'Passed'
+    parts = [six.text_type(message),
+             u'\n\nEnv: **', six.text_type(env_description),
+             u'**\n\n[Jenkins Job Result](', six.text_type(jenkins_url),
+             u')\n\n']
+    if paste_url:
+        parts += [u'\n[Trace, logs](', six.text_type(paste_url), u')\n']
+    parts.append(u'\n\n---\n')
+    trace = getattr(xunit_case, 'trace', None)
+    if trace:
+        parts += [u'\n**Trace:**\n', indent_lines(trace), u'\n']
+    return u''.join(parts)
@@ -0,0 +1,174 @@
+from __future__ import absolute_import
+from concurrent.futures import Future
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+from six.moves.urllib import parse
+
+from .testrail.retry import RetryPolicy
+
+logger = logging.getLogger(__name__)
+
+
+class PasteCache(object):
+    """Paste URLs of already uploaded bodies, kept in a JSON file.
+
+    Entries are keyed by pastebin URL and SHA-256 of paste body and expire
+    after `ttl` seconds, as pastes may be removed from the server.
+    """
+
+    version = 1
+
+    def __init__(self, path, ttl=7 * 86400):
+        self.path = path
+        self.ttl = ttl
+        self.pastes = self.load()
+        self._changed = False
+
+    def __repr__(self):
+        return '<PasteCache {}>'.format(self.path)
+
+    def load(self):
+        try:
+            with open(self.path) as f:
+                state = json.load(f)
+        except (IOError, OSError):
+            return {}
+        except ValueError as e:
+            logger.warning("Can't read paste cache {}: {}".format(
+                self.path, e))
+            return {}
+        if state.get('version') != self.version:
+            return {}
+        now = time.time()
+        return {k: v for k, v in state['pastes'].items()
+                if now - v[1] < self.ttl}
+
+    def get(self, key):
+        entry = self.pastes.get(key)
+        if entry is not None and time.time() - entry[1] < self.ttl:
+            return entry[0]
+
+    def set(self, key, url):
+        self.pastes[key] = [url, time.time()]
+        self._changed = True
+
+    def save(self):
+        if not self._changed:
+            return
+        # keep entries saved by other reporters meanwhile
+        pastes = self.load()
+        pastes.update(self.pastes)
+        directory = os.path.dirname(self.path)
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w') as f:
+                json.dump({'version': self.version, 'pastes': pastes}, f)
+            getattr(os, 'replace', os.rename)(tmp_path, self.path)
+        except Exception:
+            os.remove(tmp_path)
+            raise
+        self.pastes = pastes
+        self._changed = False
+
+
+class PasteClient(object):
+    """Client of pastebin JSON API (`pastes.newPaste` method).
+
+    All uploads share one keep-alive session, so it can be used from
+    several threads at once. Identical bodies are uploaded only once, later
+    ones get URL of the first paste (from `cache` too, if it's passed).
+    """
+
+    def __init__(self, base_url, connect_timeout=10, read_timeout=60,
+                 pool_size=8, retry_policy=None, cache=None):
+        self.base_url = base_url
+        self.cache = cache
+        self._uploads = {}
+        self._lock = threading.Lock()
+        self.timeout = (connect_timeout, read_timeout)
+        self.retry_policy = retry_policy or RetryPolicy(max_attempts=3,
+                                                        budget=120)
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size,
+                              pool_maxsize=pool_size)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+    def __repr__(self):
+        return '<PasteClient {}>'.format(self.base_url)
+
+    def close(self):
+        self.session.close()
+
+    def _post(self, url, **kwargs):
+        kwargs.setdefault('timeout', self.timeout)
+        start_time = time.time()
+        attempt = 0
+        while True:
+            attempt += 1
+            error = None
+            try:
+                response = self.session.post(url, **kwargs)
+                if response.status_code < 300:
+                    return response
+            except (requests.ConnectionError, requests.Timeout) as e:
+                response, error = None, e
+
+            elapsed = time.time() - start_time
+            delay = self.retry_policy.get_delay(attempt, response, elapsed)
+            if delay is None:
+                if error is not None:
+                    raise error
+                response.raise_for_status()
+            logger.info('Paste upload to {} failed: {}, waiting for {:.1f} '
+                        'sec until next try'.format(
+                            url, error or response.status_code, delay))
+            time.sleep(delay)
+
+    def new_paste(self, code, language='multi'):
+        """Upload `code` and return URL of the paste or None."""
+        digest = hashlib.sha256(
+            u'{}\n{}'.format(language, code).encode('utf-8')).hexdigest()
+        key = '{}|{}'.format(self.base_url, digest)
+        with self._lock:
+            future = self._uploads.get(key)
+            owner = future is None
+            if owner:
+                future = self._uploads[key] = Future()
+        if not owner:
+            # the same body is uploaded or was uploaded already
+            return future.result()
+        try:
+            url = self.cache and self.cache.get(key)
+            if not url:
+                url = self._new_paste(code, language)
+                if url and self.cache is not None:
+                    self.cache.set(key, url)
+        except Exception as e:
+            with self._lock:
+                del self._uploads[key]
+            future.set_exception(e)
+            raise
+        future.set_result(url)
+        return url
+
+    def _new_paste(self, code, language):
+        response = self._post(
+            parse.urljoin(self.base_url, '/json/?method=pastes.newPaste'),
+            json={
+                'language': language,
+                'code': code
+            })
+        paste_id = response.json().get('data')
+        if paste_id:
+            return parse.urljoin(self.base_url, '/show/{}/'.format(paste_id))
@@ -1,21 +1,72 @@
 from __future__ import absolute_import, print_function
 
+import collections
+from concurrent.futures import as_completed
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import ThreadPoolExecutor
+import functools
 from functools import wraps
 import logging
+import os
 import re
-from six.moves.urllib import parse
+import threading
 
 from jinja2 import Environment, PackageLoader
-import requests
+import six
 
+from .comment import format_comment
+from .comment import indent_lines
+from .paste import PasteCache
+from .paste import PasteClient
 from .testrail import Client as TrClient
+from .testrail.client import Case
 from .testrail.client import Run
 from .testrail.exceptions import NotFound
+from .testrail.retry import RetryPolicy
+from .testrail.snapshot import SuiteSnapshot
+from .testrail.statuses import StatusResolver
 from .vendor import xunitparser
 from .utils import truncate_head
 
 logger = logging.getLogger(__name__)
 
+# marks that paste should be uploaded while comment is generated
+_upload = object()
+
+# order of outcomes for `worst-wins` duplicates policy
+OUTCOME_SEVERITY = {'success': 0, 'skipped': 1, 'failure': 2, 'error': 3}
+
+
+def _parse_report(path):
+    return list(xunitparser.iterparse_lazy(path))
+
+
+def merge_cases(reports, policy='last-wins'):
+    """Merge lists of xUnit cases of several reports.
+
+    Cases with the same classname and methodname are merged into one: with
+    `last-wins` policy the case of the last report is taken, with
+    `worst-wins` - the case with the worst outcome (the last one of equal).
+    Cases are returned in order of their first appearance.
+    """
+    cases = collections.OrderedDict()
+    duplicates = 0
+    for report_cases in reports:
+        for xunit_case in report_cases:
+            key = (xunit_case.classname, xunit_case.methodname)
+            previous = cases.get(key)
+            if previous is not None:
+                duplicates += 1
+                severity = OUTCOME_SEVERITY.get(xunit_case.result, 0)
+                worse = OUTCOME_SEVERITY.get(previous.result, 0) > severity
+                if policy == 'worst-wins' and worse:
+                    continue
+            cases[key] = xunit_case
+    if duplicates:
+        logger.info('Merged {} duplicated xUnit cases ({})'.format(
+            duplicates, policy))
+    return list(cases.values())
+
 
 def memoize(f):
     @wraps(f)
@@ -23,7 +74,14 @@ def memoize(f):
         key = f.__name__
         cached = self._cache.get(key)
         if cached is None:
-            cached = self._cache[key] = f(self, *args, **kwargs)
+            # properties may be loaded from several threads at once (see
+            # `prefetch`), so compute each of them only once
+            with self._locks_lock:
+                lock = self._locks.setdefault(key, threading.RLock())
+            with lock:
+                cached = self._cache.get(key)
+                if cached is None:
+                    cached = self._cache[key] = f(self, *args, **kwargs)
         return cached
 
     return wrapper
@@ -33,26 +91,56 @@ class Reporter(object):
     def __init__(self, xunit_report, env_description, test_results_link,
                  case_mapper, paste_url, *args, **kwargs):
         self._config = {}
+        self.paste_workers = kwargs.pop('paste_workers', 8)
+        self.paste_cache_ttl = kwargs.pop('paste_cache_ttl', 7 * 86400)
+        self.comment_formatter = kwargs.pop('comment_formatter', 'jinja')
+        self.parse_workers = kwargs.pop('parse_workers', None)
+        self.duplicates_policy = kwargs.pop('duplicates_policy', 'last-wins')
         self._cache = {}
+        self._locks = {}
+        self._locks_lock = threading.Lock()
         self.xunit_report = xunit_report
         self.env_description = env_description
         self.test_results_link = test_results_link
         self.case_mapper = case_mapper
         self.paste_url = paste_url
         self.env = Environment(loader=PackageLoader('xunit2testrail'))
+        self.env.filters['indent_lines'] = indent_lines
 
         super(Reporter, self).__init__(*args, **kwargs)
 
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        """Close sessions of TestRail and paste clients, if they are made."""
+        for name in ('testrail_client', 'paste_client'):
+            client = self._cache.pop(name, None)
+            if client is not None:
+                client.close()
+
     def config_testrail(self, base_url, username, password, milestone, project,
                         tests_suite, plan_name, send_skipped=False,
                         use_test_run_if_exists=False, send_duplicates=False,
                         testrail_add_missing_cases=False, testrail_case_custom_fields=None,
                         testrail_case_section_name=None, testrail_configuration_name=None,
-                        dry_run=False, request_timeout=600):
+                        dry_run=False, request_timeout=600, connect_timeout=10,
+                        read_timeout=120, pool_size=10, max_attempts=None,
+                        concurrency=4, cache_dir=None,
+                        testrail_status_map=None):
         self._config['testrail'] = dict(base_url=base_url,
                                         username=username,
                                         password=password,
-                                        request_timeout=request_timeout)
+                                        request_timeout=request_timeout,
+                                        connect_timeout=connect_timeout,
+                                        read_timeout=read_timeout,
+                                        pool_size=pool_size,
+                                        retry_policy=RetryPolicy(
+                                            max_attempts=max_attempts,
+                                            budget=request_timeout))
         self.milestone_name = milestone
         self.project_name = project
         self.tests_suite_name = tests_suite
@@ -67,8 +155,12 @@ class Reporter(object):
         self.testrail_case_section_name = testrail_case_section_name
         self.testrail_configuration_name = testrail_configuration_name
         self.dry_run = dry_run
+        self.concurrency = concurrency
+        self.cache_dir = cache_dir
+        self.testrail_status_map = testrail_status_map or {}
 
     @property
+    @memoize
     def testrail_client(self):
         return TrClient(**self._config['testrail'])
 
@@ -82,25 +174,97 @@ class Reporter(object):
     def milestone(self):
         return self.project.milestones.find(name=self.milestone_name)
 
+    @property
+    @memoize
+    def configs(self):
+        return self.project.configs()
+
     @property
     @memoize
     def os_config(self):
-        return self.project.configs.find(name='Operation System')
+        return self.configs.find(name='Operation System')
 
     @property
     @memoize
     def suite(self):
         return self.project.suites.find(name=self.tests_suite_name)
 
+    @property
+    def case_fields(self):
+        """Fields of TestRail cases to keep in memory or None for all.
+
+        Slotted fields of cases are always kept, other ones (like large
+        `custom_*` texts) only if case mapper uses them.
+        """
+        get_fields = getattr(self.case_mapper, 'get_testrail_fields', None)
+        if get_fields is None:
+            return None
+        return frozenset(Case._fields).union(get_fields())
+
+    @property
+    @memoize
+    def suite_snapshot(self):
+        return SuiteSnapshot(self.suite, self.cache_dir,
+                             server=self._config['testrail']['base_url'],
+                             fields=self.case_fields)
+
     @property
     @memoize
     def cases(self):
-        return self.suite.cases()
+        if self.cache_dir:
+            return self.suite_snapshot.sync()
+        cases = self.suite.cases
+        cases.fields = self.case_fields
+        return cases()
+
+    def resync_cases(self):
+        """Forget loaded cases, next use fetches all of them again."""
+        if self.cache_dir:
+            self.suite_snapshot.invalidate()
+        self._cache.pop('cases', None)
+
+    def is_stale_cases_error(self, error):
+        """Check if TestRail rejected case ids taken from suite snapshot.
+
+        Snapshot may keep silently deleted cases until the next full sync.
+        """
+        response = getattr(error, 'response', None)
+        if not self.cache_dir or response is None:
+            return False
+        return response.status_code == 400 and 'case_ids' in response.text
 
     @property
     @memoize
     def testrail_statuses(self):
-        return self.testrail_client.statuses
+        return self.testrail_client.get_statuses()
+
+    @property
+    @memoize
+    def status_resolver(self):
+        return StatusResolver(self.testrail_statuses,
+                              self.testrail_status_map)
+
+    def prefetch(self):
+        """Fetch independent TestRail entities concurrently.
+
+        Needs asyncio, so on Python 2 entities are loaded on demand.
+        """
+        if self.concurrency < 2 or six.PY2:
+            return
+        from .testrail.aio import AsyncClient
+        from .testrail.aio import run as run_async
+
+        # all other entities belong to the project
+        self.project
+        aclient = AsyncClient(self.testrail_client,
+                              concurrency=self.concurrency)
+        # results are memoized by properties, so they are not wrapped
+        load = functools.partial(aclient.run, getattr, self)
+        try:
+            run_async(load('cases'), load('milestone'),
+                      load('testrail_statuses'))
+        finally:
+            aclient.close()
 
     def get_or_create_plan(self):
         """Get exists or create new TestRail Plan"""
@@ -115,13 +279,47 @@ class Reporter(object):
             logger.debug('Found plan "{}"'.format(self.plan_name))
         return plan
 
+    @property
+    def xunit_reports(self):
+        if isinstance(self.xunit_report, six.string_types):
+            return [self.xunit_report]
+        return list(self.xunit_report)
+
     def get_xunit_test_suite(self):
-        with open(self.xunit_report) as f:
-            ts, tr = xunitparser.parse(f)
-            return ts, tr
+        reports = self.xunit_reports
+        if len(reports) == 1:
+            with open(reports[0]) as f:
+                ts, tr = xunitparser.parse(f)
+                return ts, tr
+        ts = xunitparser.TestSuite(
+            x.to_testcase() for x in self.iter_xunit_cases())
+        return ts, ts.summary
+
+    def iter_xunit_cases(self):
+        """Yield xUnit cases of report without loading the whole XML.
+
+        Case logs are read from the report only when they are used. Cases
+        of several reports are merged according to `duplicates_policy`.
+        """
+        reports = self.xunit_reports
+        if len(reports) == 1:
+            for xunit_case in xunitparser.iterparse_lazy(reports[0]):
+                yield xunit_case
+            return
+        if self.parse_workers == 1:
+            parsed = (_parse_report(x) for x in reports)
+        else:
+            executor = ProcessPoolExecutor(max_workers=self.parse_workers)
+            parsed = executor.map(_parse_report, reports)
+        try:
+            for xunit_case in merge_cases(parsed, self.duplicates_policy):
+                yield xunit_case
+        finally:
+            if self.parse_workers != 1:
+                executor.shutdown()
 
     def get_config(self, name):
-        return self.project.configs.find(name=name)
+        return self.configs.find(name=name)
 
     def get_jenkins_report_url(self, xunit_case):
         module, _, classname = xunit_case.classname.rpartition('.')
@@ -134,7 +332,17 @@ class Reporter(object):
             classname=classname,
             methodname=methodname)
 
-    def save_to_paste(self, xunit_case):
+    @property
+    @memoize
+    def paste_client(self):
+        cache = None
+        if self.cache_dir:
+            cache = PasteCache(os.path.join(self.cache_dir, 'pastes.json'),
+                               ttl=self.paste_cache_ttl)
+        return PasteClient(self.paste_url, pool_size=self.paste_workers,
+                           cache=cache)
+
+    def build_paste_body(self, xunit_case):
         max_paste_size = 65535
         chars_available = max_paste_size
 
@@ -144,18 +352,18 @@ class Reporter(object):
                    'stdout': '### stdout.log\n',
                    'stderr': '### stderr.log\n'}
 
-        trace = getattr(xunit_case, 'trace', None)
+        trace = xunit_case.get_payload('trace')
 
         if trace:
             code = truncate_head(headers['trace'], trace, chars_available)
             chars_available -= len(code) + 1
 
-        stderr = getattr(xunit_case, 'stderr', None)
+        stderr = xunit_case.get_payload('stderr')
         if stderr:
             stderr = truncate_head(headers['stderr'], stderr, chars_available)
             chars_available -= len(stderr) + 1
 
-        stdout = getattr(xunit_case, 'stdout', None)
+        stdout = xunit_case.get_payload('stdout')
         if stdout:
             code += '\n' + truncate_head(headers['stdout'], stdout,
                                          chars_available)
@@ -163,57 +371,89 @@ class Reporter(object):
         if stderr:
             code += '\n' + stderr
 
-        r = requests.post(
-            parse.urljoin(self.paste_url, '/json/?method=pastes.newPaste'),
-            json={
-                'language': 'multi',
-                'code': code
-            })
-        paste_id = r.json().get('data')
-        if paste_id:
-            return parse.urljoin(self.paste_url, '/show/{}/'.format(paste_id))
-
-    def gen_testrail_comment(self, xunit_case):
-        template = self.env.get_template('testrail_comment.md')
-        jenkins_url = self.get_jenkins_report_url(xunit_case)
-        paste_url = None
-        if not xunit_case.success and self.paste_url:
-            try:
-                paste_url = self.save_to_paste(xunit_case)
-            except Exception as e:
-                logger.warning(e)
+        return code
 
-        return template.render(xunit_case=xunit_case,
-                               env_description=self.env_description,
-                               jenkins_url=jenkins_url,
-                               paste_url=paste_url)
+    def save_to_paste(self, xunit_case):
+        return self.paste_client.new_paste(self.build_paste_body(xunit_case))
+
+    def need_paste(self, xunit_case):
+        return bool(self.paste_url) and not xunit_case.success
+
+    def upload_pastes(self, xunit_cases):
+        """Upload logs of cases concurrently.
+
+        Yields `(index, paste_url)` pairs in order of upload completion,
+        paste_url is None if upload failed.
+        """
+        with ThreadPoolExecutor(max_workers=self.paste_workers) as executor:
+            futures = {executor.submit(self.save_to_paste, x): i
+                       for i, x in enumerate(xunit_cases)}
+            for future in as_completed(futures):
+                try:
+                    paste_url = future.result()
+                except Exception as e:
+                    logger.warning(e)
+                    paste_url = None
+                yield futures[future], paste_url
+        if self.paste_client.cache is not None:
+            self.paste_client.cache.save()
 
-    def add_result_to_case(self, testrail_case, xunit_case):
-        if xunit_case.success:
-            status_name = 'passed'
-        elif xunit_case.failed:
-            status_name = 'failed'
-        elif xunit_case.skipped:
-            if self.send_skipped:
-                status_name = 'skipped'
-            else:
-                logger.debug('Case {0.classname}.{0.methodname} '
-                             'is skipped'.format(xunit_case))
-                return
-        elif xunit_case.errored:
-            status_name = 'blocked'
+    @property
+    @memoize
+    def comment_template(self):
+        return self.env.get_template('testrail_comment.md')
+
+    def render_comments(self, xunit_cases, paste_urls=None):
+        """Make TestRail comments for list of xUnit cases.
+
+        `paste_urls` is a list of paste URLs of the same cases.
+        """
+        if paste_urls is None:
+            paste_urls = [None] * len(xunit_cases)
+        if self.comment_formatter == 'fast':
+            render = format_comment
         else:
-            logger.warning('Unknown xunit case {} status {}'.format(
-                xunit_case.methodname, xunit_case.result))
+            def render(xunit_case, env_description, jenkins_url, paste_url,
+                       _render=self.comment_template.render):
+                return _render(xunit_case=xunit_case,
+                               env_description=env_description,
+                               jenkins_url=jenkins_url,
+                               paste_url=paste_url)
+        env_description = self.env_description
+        get_jenkins_url = self.get_jenkins_report_url
+        return [render(x, env_description, get_jenkins_url(x), paste_url)
+                for x, paste_url in zip(xunit_cases, paste_urls)]
+
+    def gen_testrail_comment(self, xunit_case, paste_url=_upload):
+        if paste_url is _upload:
+            paste_url = None
+            if self.need_paste(xunit_case):
+                try:
+                    paste_url = self.save_to_paste(xunit_case)
+                except Exception as e:
+                    logger.warning(e)
+
+        return self.render_comments([xunit_case], [paste_url])[0]
+
+    def add_result_to_case(self, testrail_case, xunit_case,
+                           paste_url=_upload, comment=None):
+        if xunit_case.skipped and not self.send_skipped:
+            logger.debug('Case {0.classname}.{0.methodname} '
+                         'is skipped'.format(xunit_case))
             return
-        status_ids = [k for k, v in self.testrail_statuses.items()
-                      if v == status_name]
-        if len(status_ids) == 0:
-            logger.warning("Can't find status {} for result {}".format(
-                status_name, xunit_case.methodname))
+        resolver = self.status_resolver
+        status_id = resolver.resolve(xunit_case.result)
+        if status_id is None:
+            if xunit_case.result in resolver.outcomes:
+                logger.warning("Can't find status {} for result {}".format(
+                    resolver.get_status_name(xunit_case.result),
+                    xunit_case.methodname))
+            else:
+                logger.warning('Unknown xunit case {} status {}'.format(
+                    xunit_case.methodname, xunit_case.result))
             return
-        status_id = status_ids[0]
-        comment = self.gen_testrail_comment(xunit_case)
+        if comment is None:
+            comment = self.gen_testrail_comment(xunit_case, paste_url)
         elasped = int(xunit_case.time.total_seconds())
         if elasped > 0:
             elasped = "{}s".format(elasped)
@@ -223,9 +463,9 @@ class Reporter(object):
         return testrail_case
 
     def map_cases(self, xunit_suite):
-        cases = self.suite.cases()
+        self.prefetch()
         return self.case_mapper.map(xunit_suite,
-                                    cases,
+                                    self.cases,
                                     self.suite,
                                     self.milestone.id,
                                     self.send_duplicates,
@@ -235,11 +475,32 @@ class Reporter(object):
                                     self.dry_run)
 
     def fill_case_results(self, mapping):
-        filtered_cases = []
-        for testrail_case, xunit_case in mapping.items():
-            if self.add_result_to_case(testrail_case, xunit_case):
-                filtered_cases.append(testrail_case)
-        return filtered_cases
+        items = list(mapping.items())
+        added = [None] * len(items)
+        to_paste = []
+        to_render = []
+        for i, (testrail_case, xunit_case) in enumerate(items):
+            if xunit_case.skipped and not self.send_skipped:
+                continue
+            if self.need_paste(xunit_case):
+                to_paste.append(i)
+            else:
+                to_render.append(i)
+        comments = self.render_comments([items[i][1] for i in to_render])
+        for i, comment in zip(to_render, comments):
+            testrail_case, xunit_case = items[i]
+            added[i] = self.add_result_to_case(testrail_case, xunit_case,
+                                               comment=comment)
+        # comments of failed cases are made as soon as their logs are saved
+        pastes = self.upload_pastes([items[i][1] for i in to_paste])
+        for n, paste_url in pastes:
+            i = to_paste[n]
+            testrail_case, xunit_case = items[i]
+            added[i] = self.add_result_to_case(testrail_case, xunit_case,
+                                               paste_url=paste_url)
+        # logs are in comments and pastes already, release mapped reports
+        xunitparser.close_reports(x for _, x in items)
+        return [x for x in added if x]
 
     def create_test_run(self, name, plan, cases,
                         config_ids=None, selected_config=None):
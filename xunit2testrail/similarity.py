@@ -0,0 +1,79 @@
+from __future__ import absolute_import
+from array import array
+from bisect import bisect_left
+from collections import Counter
+from collections import defaultdict
+import heapq
+import re
+
+_non_word = re.compile(r'[\W_]+', re.UNICODE)
+
+
+def get_trigrams(text):
+    """Return set of character trigrams of normalized text.
+
+    Text is lowercased and runs of non-alphanumeric characters become single
+    spaces, so `test_foo_bar` and `Test foo bar` have the same trigrams.
+    """
+    text = u' {} '.format(_non_word.sub(u' ', text.lower()).strip())
+    return set(text[i:i + 3] for i in range(len(text) - 2))
+
+
+class TrigramIndex(object):
+    """Index of texts to find most similar ones to a query.
+
+    Similarity is Jaccard index of text trigram sets. Candidates are
+    selected by the rarest query trigrams (`budget` limits number of their
+    occurrences to count), the best `candidates` of them are scored exactly.
+    """
+
+    budget = 1000
+    candidates = 30
+
+    def __init__(self, texts):
+        postings = defaultdict(lambda: array('I'))
+        self.sizes = array('I')
+        for i, text in enumerate(texts):
+            trigrams = get_trigrams(text or u'')
+            self.sizes.append(len(trigrams))
+            for trigram in trigrams:
+                postings[trigram].append(i)
+        self.postings = dict(postings)
+
+    def __len__(self):
+        return len(self.sizes)
+
+    def __repr__(self):
+        return '<TrigramIndex of {} texts>'.format(len(self))
+
+    def search(self, text, count=3, min_score=0.0):
+        """Return up to `count` (score, text index) most similar to text."""
+        trigrams = get_trigrams(text)
+        # texts of each trigram in ascending order
+        postings = sorted((self.postings[x] for x in trigrams
+                           if x in self.postings), key=len)
+        found = Counter()
+        total = 0
+        for posting in postings:
+            if found and total + len(posting) > self.budget:
+                break
+            total += len(posting)
+            found.update(posting)
+
+        def get_common(i):
+            common = 0
+            for posting in postings:
+                j = bisect_left(posting, i)
+                if j < len(posting) and posting[j] == i:
+                    common += 1
+            return common
+
+        sizes = self.sizes
+        size = len(trigrams)
+        scores = []
+        for i, _ in found.most_common(max(self.candidates, count)):
+            n = get_common(i)
+            # earlier texts go first on the same score
+            scores.append((float(n) / (size + sizes[i] - n), -i))
+        return [(score, -i) for score, i in heapq.nlargest(count, scores)
+                if score >= min_score]
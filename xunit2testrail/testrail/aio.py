@@ -0,0 +1,134 @@
+"""asyncio counterparts of TestRail client objects.
+
+Requests are made by the synchronous `Client` (with its pooled session and
+retry policy) in a bounded thread pool, so independent calls can be awaited
+concurrently:
+
+    aclient = AsyncClient(client, concurrency=8)
+    project = run(aclient.projects.find(name='Project'))
+    suite, milestone = run(project.suites.find(name='Suite'),
+                           project.milestones.find(name='1.0'))
+"""
+from __future__ import absolute_import
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+import functools
+
+from .client import BaseItem
+from .client import Client
+from .client import Collection
+from .client import ItemSet
+
+
+def run(*coros):
+    """Run coroutines concurrently in a new event loop.
+
+    Returns result of the coroutine if only one is passed, otherwise list of
+    results in the same order.
+    """
+    async def main():
+        return await asyncio.gather(*coros)
+
+    loop = asyncio.new_event_loop()
+    try:
+        results = loop.run_until_complete(main())
+    finally:
+        loop.close()
+    return results[0] if len(coros) == 1 else results
+
+
+class AsyncClient(object):
+    def __init__(self, client=None, concurrency=8, **kwargs):
+        self.client = client or Client(**kwargs)
+        self.concurrency = concurrency
+        self._executor = ThreadPoolExecutor(max_workers=concurrency)
+
+    def __repr__(self):
+        return '<AsyncClient concurrency={}>'.format(self.concurrency)
+
+    async def run(self, func, *args, **kwargs):
+        """Call blocking `func` in the pool and return its result as is."""
+        loop = asyncio.get_event_loop()
+        return await loop.run_in_executor(
+            self._executor, functools.partial(func, *args, **kwargs))
+
+    async def call(self, func, *args, **kwargs):
+        """Call blocking `func` in the pool and wrap its result."""
+        return self.wrap(await self.run(func, *args, **kwargs))
+
+    def wrap(self, value):
+        if isinstance(value, BaseItem):
+            return AsyncItem(value, self)
+        if isinstance(value, Collection):
+            return AsyncCollection(value, self)
+        if isinstance(value, ItemSet):
+            items = ItemSet(self.wrap(x) for x in value)
+            items._item_class = value._item_class
+            return items
+        return value
+
+    def close(self):
+        self._executor.shutdown(wait=True)
+
+    @property
+    def projects(self):
+        return self.wrap(self.client.projects)
+
+    async def get_statuses(self):
+        return await self.call(lambda: self.client.statuses)
+
+
+class AsyncCollection(object):
+    def __init__(self, collection, client):
+        self._collection = collection
+        self._client = client
+
+    def __repr__(self):
+        return '<Async {!r}>'.format(self._collection)
+
+    async def __call__(self, id=None):
+        return await self._client.call(self._collection, id)
+
+    async def find_all(self, **kwargs):
+        return await self._client.call(self._collection.find_all, **kwargs)
+
+    async def find(self, **kwargs):
+        return await self._client.call(self._collection.find, **kwargs)
+
+    async def get(self, id):
+        return await self._client.call(self._collection.get, id)
+
+    async def add(self, **kwargs):
+        return await self._client.call(self._collection.add, **kwargs)
+
+    async def list(self):
+        return await self._client.call(self._collection.list)
+
+
+class AsyncItem(object):
+    """Proxy of `Item` or `CompactItem`, which makes its methods awaitable.
+
+    Data fields are read from the wrapped item as is, collections are
+    wrapped with `AsyncCollection`, methods return coroutines.
+    """
+
+    def __init__(self, item, client):
+        self.__dict__['_item'] = item
+        self.__dict__['_client'] = client
+
+    def __getattr__(self, name):
+        value = getattr(self._item, name)
+        if isinstance(value, Collection):
+            return self._client.wrap(value)
+        if callable(value) and not isinstance(value, type):
+            return functools.partial(self._client.call, value)
+        return value
+
+    def __setattr__(self, name, value):
+        setattr(self._item, name, value)
+
+    def __repr__(self):
+        return '<Async {!r}>'.format(self._item)
+
+    def unwrap(self):
+        return self._item
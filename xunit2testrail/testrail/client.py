@@ -1,11 +1,15 @@
 from __future__ import absolute_import
+from concurrent.futures import ThreadPoolExecutor
 import logging
-import random
+import threading
 import time
 
 import requests
+from requests.adapters import HTTPAdapter
 
 from .exceptions import NotFound
+from .exceptions import UploadError
+from .retry import RetryPolicy
 
 logger = logging.getLogger(__name__)
 
@@ -13,15 +17,141 @@ requests_logger = logging.getLogger('requests.packages.urllib3')
 requests_logger.setLevel(logging.WARNING)
 
 
+def paginate(handler, url, key, params=None, prefetch=False):
+    """Yield pages of list request results.
+
+    Newer TestRail versions return bulk lists as pages like
+    `{"offset": 0, "limit": 250, "_links": {"next": ...}, "<key>": [...]}`,
+    older ones return the whole list at once.
+    """
+    def fetch(url, params=None):
+        result = handler('GET', url, params=params)
+        if 'error' in result:
+            raise Exception(result)
+        return result
+
+    executor = ThreadPoolExecutor(max_workers=1) if prefetch else None
+    try:
+        result = fetch(url, params=params)
+        while True:
+            if not isinstance(result, dict):
+                yield result
+                return
+            next_url = (result.get('_links') or {}).get('next')
+            if next_url:
+                # link looks like `/api/v2/get_cases/1&suite_id=2&offset=250`
+                next_url = next_url.split('/api/v2/', 1)[-1]
+                if executor is not None:
+                    next_result = executor.submit(fetch, next_url)
+            yield result.get(key, [])
+            if not next_url:
+                return
+            if executor is not None:
+                result = next_result.result()
+            else:
+                result = fetch(next_url)
+    finally:
+        if executor is not None:
+            executor.shutdown(wait=False)
+
+
+_missing = object()
+
+# guards lazy index builds of all item sets, they are rare and short
+_index_lock = threading.Lock()
+
+
+def _hashable(value):
+    """Make index key from value, keeping equality semantic."""
+    if isinstance(value, list):
+        return list, tuple(_hashable(x) for x in value)
+    if isinstance(value, dict):
+        return dict, frozenset((k, _hashable(v)) for k, v in value.items())
+    hash(value)
+    return value
+
+
+def _get_loaded(item, name):
+    """Return field of item or `_missing`, without fetching item data."""
+    if name != 'id' and not hasattr(type(item), name):
+        get_field = getattr(item, 'get_field', None)
+        if get_field is not None:
+            return get_field(name, _missing)
+    return getattr(item, name, _missing)
+
+
+def _matches(item, kwargs):
+    return all(getattr(item, k, _missing) == v for k, v in kwargs.items())
+
+
 class ItemSet(list):
+    """List of items with hash indexes for `find` and `find_all`.
+
+    First lookup by a set of fields scans the list, index for it is built
+    on the next one, so lists searched only once don't pay for it. Index is
+    dropped when list is changed. Changing fields of already indexed items
+    is not tracked.
+    """
+
+    _unindexable = object()
+    # fields were looked up once, index is not built yet
+    _scanned = object()
+
     def __init__(self, *args, **kwargs):
         self._item_class = None
+        self._indexes = {}
         return super(ItemSet, self).__init__(*args, **kwargs)
 
+    def _get_index(self, fields):
+        """Return (index, positions of not indexed items) or None to scan.
+
+        Items, which fields are not loaded yet (like partial runs), are not
+        indexed, they are checked one by one on lookup.
+        """
+        index = self._indexes.get(fields)
+        if index is None or index is self._scanned:
+            with _index_lock:
+                index = self._build_index(fields)
+        if index is self._unindexable:
+            return None
+        return index
+
+    def _build_index(self, fields):
+        index = self._indexes.get(fields)
+        if index is None:
+            self._indexes[fields] = self._scanned
+        elif index is self._scanned:
+            index = {}
+            not_indexed = []
+            try:
+                for i, item in enumerate(self):
+                    values = [_get_loaded(item, x) for x in fields]
+                    if any(x is _missing for x in values):
+                        not_indexed.append(i)
+                        continue
+                    key = tuple(_hashable(x) for x in values)
+                    index.setdefault(key, []).append(i)
+                index = (index, not_indexed)
+            except TypeError:
+                index = self._unindexable
+            self._indexes[fields] = index
+        return index
+
     def find_all(self, **kwargs):
-        filtered = ItemSet(
-            x for x in self
-            if all(getattr(x, k) == v for k, v in kwargs.items()))
+        fields = tuple(sorted(kwargs))
+        index = self._get_index(fields)
+        if index is not None:
+            try:
+                key = tuple(_hashable(kwargs[x]) for x in fields)
+            except TypeError:
+                index = None
+        if index is None:
+            filtered = ItemSet(x for x in self if _matches(x, kwargs))
+        else:
+            index, not_indexed = index
+            positions = index.get(key, []) + [
+                i for i in not_indexed if _matches(self[i], kwargs)]
+            filtered = ItemSet(self[i] for i in sorted(positions))
         filtered._item_class = self._item_class
         return filtered
 
@@ -33,43 +163,73 @@ class ItemSet(list):
             raise NotFound(self._item_class, **kwargs)
 
 
+def _invalidate_indexes(name):
+    method = getattr(list, name)
+
+    def wrapper(self, *args, **kwargs):
+        self._indexes = {}
+        return method(self, *args, **kwargs)
+
+    wrapper.__name__ = name
+    wrapper.__doc__ = method.__doc__
+    return wrapper
+
+
+for _name in ('append', 'extend', 'insert', 'remove', 'pop', 'clear', 'sort',
+              'reverse', '__setitem__', '__delitem__', '__iadd__', '__imul__',
+              '__setslice__', '__delslice__'):
+    if hasattr(list, _name):
+        setattr(ItemSet, _name, _invalidate_indexes(_name))
+
+
 class Collection(object):
 
     _list_url = 'get_{name}s'
     _add_url = 'add_{name}'
+    # If set, only these fields of fetched items are kept
+    fields = None
 
-    def __init__(self, item_class=None, parent_id=None, **kwargs):
+    def __init__(self, item_class=None, parent_id=None, client=None,
+                 **kwargs):
         self._item_class = item_class
-        self._handler = self._item_class._handler
+        self._client = client
         self.parent_id = parent_id
         for k, v in kwargs.items():
             setattr(self, k, v)
 
     def __call__(self, id=None):
-        name = self._item_class._api_name()
         if id is None:
-            items = self._list(name)
-            if 'error' in items:
-                raise Exception(items)
-            items = ItemSet(self._to_object(x) for x in items)
+            items = ItemSet(self.iter())
             items._item_class = self._item_class
             return items
 
         else:
-            return self._item_class.get(id)
+            return self.get(id)
 
     def __repr__(self):
         return '<Collection of {}>'.format(self._item_class.__name__)
 
-    def _to_object(self, data):
-        return self._item_class(**data)
+    @property
+    def _handler(self):
+        if self._client is None:
+            raise ValueError(
+                '{!r} is not bound to TestRail client'.format(self))
+        return self._client._query
 
-    def _list(self, name, params=None):
-        params = params or {}
+    def _to_object(self, data):
+        if self.fields is not None:
+            data = {k: v for k, v in data.items()
+                    if k in self.fields or k == 'id'}
+        item = self._item_class(**data)
+        item._client = self._client
+        return item
+
+    def _list(self, name, params=None, prefetch=False):
         url = self._list_url.format(name=name)
         if self.parent_id is not None:
             url += '/{}'.format(self.parent_id)
-        return self._handler('GET', url, params=params)
+        return paginate(self._handler, url, key='{}s'.format(name),
+                        params=params, prefetch=prefetch)
 
     def _add(self, name, data, **kwargs):
         url = self._add_url.format(name=name)
@@ -89,7 +249,7 @@ class Collection(object):
         return self().find(**kwargs)
 
     def get(self, id):
-        return self._item_class.get(id)
+        return self._item_class.get(id, self._client)
 
     def add(self, **kwargs):
         item = self._to_object(kwargs)
@@ -97,80 +257,167 @@ class Collection(object):
         return self._to_object(result)
 
     def list(self):
+        return self()
+
+    def iter(self, params=None, prefetch=False):
+        """Lazily yield items page by page.
+
+        `params` are passed as filters to the list request, with `prefetch`
+        the next page is requested while the current one is processed.
+        """
+        for data in self.iter_data(params=params, prefetch=prefetch):
+            yield self._to_object(data)
+
+    def iter_data(self, params=None, prefetch=False):
+        """Like `iter`, but yield raw items data."""
         name = self._item_class._api_name()
-        return ItemSet([self._item_class(**i) for i in self._list(name=name)])
+        for page in self._list(name, params=params, prefetch=prefetch):
+            for data in page:
+                yield data
 
 
-class Item(object):
+class BaseItem(object):
+    """Behaviour shared by `Item` and `CompactItem`."""
+
+    __slots__ = ()
     _get_url = 'get_{name}/{id}'
     _update_url = 'update_{name}/{id}'
-    _handler = None
     _repr_field = 'name'
-
-    def __init__(self, id=None, **kwargs):
-        self.id = id
-        self._data = kwargs
+    # Client to make requests with, items made by collections get the
+    # collection's one
+    _client = None
 
     @classmethod
     def _api_name(cls):
         return cls.__name__.lower()
 
-    def __getattr__(self, name):
-        if name in self._data:
-            return self._data[name]
-        else:
-            raise AttributeError
-
-    def __setattr__(self, name, value):
-        if '_data' in self.__dict__ and name not in self.__dict__:
-            self.__dict__['_data'][name] = value
-        else:
-            self.__dict__[name] = value
-
     def __repr__(self):
         name = getattr(self, self._repr_field, '')
         name = repr(name)
         return '<{c.__name__}({s.id}) {name} at 0x{id:x}>'.format(
             s=self, c=self.__class__, id=id(self), name=name)
 
+    @property
+    def _handler(self):
+        if self._client is None:
+            raise ValueError(
+                '{!r} is not bound to TestRail client'.format(self))
+        return self._client._query
+
     @classmethod
-    def get(cls, id):
+    def get(cls, id, client):
         name = cls._api_name()
         url = cls._get_url.format(name=name, id=id)
-        result = cls._handler('GET', url)
+        result = client._query('GET', url)
         if 'error' in result:
             raise Exception(result)
-        return cls(**result)
+        item = cls(**result)
+        item._client = client
+        return item
 
     def update(self):
         url = self._update_url.format(name=self._api_name(), id=self.id)
         self._handler('POST', url, json=self.data)
 
+
+class Item(BaseItem):
+    def __init__(self, id=None, **kwargs):
+        self.id = id
+        self._data = kwargs
+
+    def __getattr__(self, name):
+        if name in self._data:
+            return self._data[name]
+        else:
+            raise AttributeError
+
+    def __setattr__(self, name, value):
+        is_field = '_data' in self.__dict__ and not name.startswith('_')
+        if is_field and name not in self.__dict__:
+            self.__dict__['_data'][name] = value
+        else:
+            self.__dict__[name] = value
+
     @property
     def data(self):
         return self._data
 
+    def get_field(self, name, default=None):
+        """Return value of data field, without making `data` dict."""
+        return self._data.get(name, default)
+
+
+class CompactItem(BaseItem):
+    """Item for bulk entities with a fixed fields layout.
+
+    Fields listed in `_fields` are stored in slots (subclasses should
+    declare `__slots__` containing them), so there is no per-instance
+    `__dict__` and access to them doesn't go through `__getattr__`. Other
+    fields returned by API are kept in `_extra` dict.
+    """
+    __slots__ = ('id', '_extra', '_client')
+    _fields = ()
+
+    def __init__(self, id=None, **kwargs):
+        object.__setattr__(self, '_extra', None)
+        object.__setattr__(self, '_client', None)
+        self.id = id
+        for name, value in kwargs.items():
+            setattr(self, name, value)
+
+    def __getattr__(self, name):
+        if name != '_extra' and self._extra and name in self._extra:
+            return self._extra[name]
+        raise AttributeError(name)
+
+    def __setattr__(self, name, value):
+        try:
+            object.__setattr__(self, name, value)
+        except AttributeError:
+            if self._extra is None:
+                object.__setattr__(self, '_extra', {})
+            self._extra[name] = value
+
+    @property
+    def data(self):
+        """Item fields as a new dict."""
+        data = {}
+        for name in self._fields:
+            value = getattr(self, name, _missing)
+            if value is not _missing:
+                data[name] = value
+        if self._extra:
+            data.update(self._extra)
+        return data
+
+    def get_field(self, name, default=None):
+        if name in self._fields:
+            return getattr(self, name, default)
+        if self._extra:
+            return self._extra.get(name, default)
+        return default
+
 
 class Project(Item):
     @property
     def suites(self):
-        return Collection(Suite, parent_id=self.id)
+        return Collection(Suite, parent_id=self.id, client=self._client)
 
     @property
     def plans(self):
-        return Collection(Plan, parent_id=self.id)
+        return Collection(Plan, parent_id=self.id, client=self._client)
 
     @property
     def runs(self):
-        return Collection(Run, parent_id=self.id)
+        return Collection(Run, parent_id=self.id, client=self._client)
 
     @property
     def milestones(self):
-        return Collection(Milestone, parent_id=self.id)
+        return Collection(Milestone, parent_id=self.id, client=self._client)
 
     @property
     def configs(self):
-        return Collection(Config, parent_id=self.id)
+        return Collection(Config, parent_id=self.id, client=self._client)
 
 
 class Suite(Item):
@@ -178,6 +425,7 @@ class Suite(Item):
     def cases(self):
         return CaseCollection(
             Case,
+            client=self._client,
             _list_url='get_cases/{}&suite_id={}'.format(self.project_id,
                                                         self.id))
 
@@ -217,8 +465,14 @@ class CaseCollection(Collection):
         return self._handler('POST', url, json=data, **kwargs)
 
 
-class Case(Item):
+class Case(CompactItem):
     _repr_field = 'title'
+    _fields = ('title', 'section_id', 'template_id', 'type_id',
+               'priority_id', 'milestone_id', 'refs', 'created_by',
+               'created_on', 'updated_by', 'updated_on', 'estimate',
+               'estimate_forecast', 'suite_id', 'display_order',
+               'is_deleted')
+    __slots__ = _fields + ('result',)
 
     def __init__(self, *args, **kwargs):
         super(Case, self).__init__(*args, **kwargs)
@@ -229,6 +483,9 @@ class Case(Item):
 
 
 class Plan(Item):
+    # ItemSet of runs made from entries
+    _runs = None
+
     def __init__(self,
                  name,
                  description=None,
@@ -247,8 +504,18 @@ class Plan(Item):
 
     @property
     def runs(self):
-        return ItemSet([Run.get(id=run['id'])
-                        for entry in self.entries for run in entry['runs']])
+        """Runs of all plan entries.
+
+        Runs are built from data included into the plan, full run data is
+        fetched only if some absent field is read. The same runs are
+        returned until entries are changed with `add_run` or `update_run`.
+        """
+        if self._runs is None:
+            runs = ItemSet(Run.from_plan_entry(self, entry, run)
+                           for entry in self.entries for run in entry['runs'])
+            runs._item_class = Run
+            self._runs = runs
+        return self._runs
 
     def add_run(self, run, configuration=None):
         url = 'add_plan_entry/{}'.format(self.id)
@@ -283,9 +550,17 @@ class Plan(Item):
         }
 
         result = self._handler('POST', url, json=entry)
+        self.entries.append(result)
+        self._runs = None
         new_run_data = [r for r in result['runs'] if set(r['config_ids']) == set(run_data['config_ids'])][0]
+        new_run_data = dict(new_run_data)
         run.id = new_run_data.pop('id')
         run.data.update(new_run_data)
+        run.data.setdefault('plan_id', self.id)
+        # run is created with exactly these cases, so no need to list them
+        run._case_ids = set(run_data.get('case_ids') or ())
+        run._plan = self
+        run._client = self._client
 
     def update_run(self, run):
         entry = [_entry
@@ -297,19 +572,27 @@ class Plan(Item):
             config_ids.extend(_run['config_ids'])
         url = 'update_plan_entry/{0}/{1}'.format(self.id, entry['id'])
         update_data = {
-            'name': run.data['name'],
-            'description': run.data['description'],
-            'assignedto_id': run.data['assignedto_id'],
-            'include_all': run.data['include_all'],
-            'case_ids': run.data['case_ids'],
+            'name': run.name,
+            'description': run.description,
+            'assignedto_id': run.assignedto_id,
+            'include_all': run.include_all,
+            'case_ids': run.case_ids,
         }
         if config_ids:
             update_data['config_ids'] = config_ids
 
         entry.update(self._handler('POST', url, json=update_data))
+        self._runs = None
 
 
 class Run(Item):
+    # Run is built from plan entry data and not fetched completely yet
+    _partial = False
+    # Plan the run was taken from or added to
+    _plan = None
+    # Set of IDs of cases included into the run, if known
+    _case_ids = None
+
     def __init__(self,
                  suite_id=None,
                  milestone_id=None,
@@ -330,42 +613,106 @@ class Run(Item):
         kwargs.update(add_kwargs)
         return super(self.__class__, self).__init__(id, **kwargs)
 
+    @classmethod
+    def from_plan_entry(cls, plan, entry, data):
+        """Make run from `get_plan` entry data without extra requests.
+
+        Such run is partial: reading a field absent in the entry data
+        fetches full run data once.
+        """
+        data = dict(data)
+        data.setdefault('plan_id', plan.id)
+        if 'id' in entry:
+            data.setdefault('entry_id', entry['id'])
+        if 'suite_id' in entry:
+            data.setdefault('suite_id', entry['suite_id'])
+        run = cls.__new__(cls)
+        run.id = data.pop('id')
+        run._data = data
+        run._partial = True
+        run._plan = plan
+        run._client = plan._client
+        return run
+
+    def __getattr__(self, name):
+        partial_field = self._partial and not name.startswith('_')
+        if partial_field and name not in self._data:
+            self.refresh()
+        return super(Run, self).__getattr__(name)
+
+    def refresh(self):
+        """Fetch full run data."""
+        self._partial = False
+        url = self._get_url.format(name=self._api_name(), id=self.id)
+        result = self._handler('GET', url)
+        if 'error' in result:
+            raise Exception(result)
+        for k, v in self.__class__(**result).data.items():
+            self._data.setdefault(k, v)
+
     @property
     def tests(self):
-        return Collection(Test, parent_id=self.id)
+        return Collection(Test, parent_id=self.id, client=self._client)
 
     @property
     def results(self):
-        return ResultCollection(Result, parent_id=self.id)
+        return ResultCollection(Result, parent_id=self.id,
+                                client=self._client)
 
-    def add_results_for_cases(self, cases):
-        if not self.include_all:
+    def get_case_ids(self):
+        """Return set of IDs of cases included into the run."""
+        if self._case_ids is None:
             # IDs can't be taken from self.case_ids set because it's always
-            # empty now, see https://goo.gl/uunbEH
-            cases_ids = [test.case_id for test in self.tests.list()]
+            # empty for fetched runs, see https://goo.gl/uunbEH
+            self._case_ids = set(test.case_id for test in self.tests.iter())
+        return self._case_ids
+
+    def add_results_for_cases(self, cases, chunk_size=None, workers=1):
+        if not self.include_all:
+            cases_ids = self.get_case_ids()
             missing_cases_ids = [case.id for case in cases
                                  if case.id not in cases_ids]
             if missing_cases_ids:
                 logger.debug('Adding {0} missing test cases '
                              'to the run'.format(len(missing_cases_ids)))
-                self.case_ids = cases_ids + missing_cases_ids
-                run_data = self.get(self.id)
-                if hasattr(run_data, 'plan_id') and run_data.plan_id:
-                    Plan.get(id=self.plan_id).update_run(run=self)
+                self.case_ids = list(cases_ids) + missing_cases_ids
+                if 'plan_id' not in self._data:
+                    self.plan_id = getattr(self.get(self.id, self._client),
+                                           'plan_id', None)
+                if self.plan_id:
+                    plan = self._plan
+                    if plan is None or plan.id != self.plan_id:
+                        plan = Plan.get(self.plan_id, self._client)
+                    plan.update_run(run=self)
                 else:
                     self.update()
-        return self.results.add_for_cases(self.id, cases)
+                # the run includes them only after successful update
+                cases_ids.update(missing_cases_ids)
+        return self.results.add_for_cases(self.id, cases,
+                                          chunk_size=chunk_size,
+                                          workers=workers)
 
 
-class Test(Item):
-    pass
+class Test(CompactItem):
+    _repr_field = 'title'
+    _fields = ('case_id', 'status_id', 'assignedto_id', 'run_id', 'title',
+               'template_id', 'type_id', 'priority_id', 'estimate',
+               'estimate_forecast', 'refs', 'milestone_id')
+    __slots__ = _fields
 
 
 class ResultCollection(Collection):
 
     _list_url = 'get_results_for_run'
 
-    def add_for_cases(self, run_id, cases):
+    def add_for_cases(self, run_id, cases, chunk_size=None, workers=1):
+        """Send results of cases to the run.
+
+        Results are split to chunks of `chunk_size` (all at once by default)
+        which are sent by `workers` threads, so failed chunk is retried
+        alone. If some chunks can't be sent, UploadError is raised after all
+        other chunks are done.
+        """
         if len(cases) == 0:
             logger.warning('No cases with result for run {}'.format(run_id))
             return
@@ -376,15 +723,48 @@ class ResultCollection(Collection):
             result = case.result.data
             result['case_id'] = case.id
             results.append(result)
-        if results is not None:
-            url = 'add_results_for_cases/{}'.format(run_id)
-            result = self._handler('POST', url, json={'results': results})
-            return [self._to_object(x) for x in result]
-        else:
+        if not results:
             return []
+        url = 'add_results_for_cases/{}'.format(run_id)
+        chunk_size = chunk_size or len(results)
+        chunks = [results[i:i + chunk_size]
+                  for i in range(0, len(results), chunk_size)]
+
+        def send(num, chunk):
+            start_time = time.time()
+            try:
+                result = self._handler('POST', url, json={'results': chunk})
+            except Exception as e:
+                logger.error('Chunk {}/{} ({} results) failed after {:.1f} '
+                             'sec: {}'.format(num, len(chunks), len(chunk),
+                                              time.time() - start_time, e))
+                raise
+            logger.info('Chunk {}/{} ({} results) sent in {:.1f} sec'.format(
+                num, len(chunks), len(chunk), time.time() - start_time))
+            return result
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(send, num, chunk)
+                       for num, chunk in enumerate(chunks, 1)]
+
+        added = []
+        failed = []
+        for chunk, future in zip(chunks, futures):
+            try:
+                added.extend(self._to_object(x) for x in future.result())
+            except Exception as e:
+                failed.append((chunk, e))
+        if failed:
+            raise UploadError(run_id, added, failed)
+        return added
 
 
-class Result(Item):
+class Result(CompactItem):
+    _fields = ('test_id', 'status_id', 'comment', 'version', 'elapsed',
+               'defects', 'assignedto_id', 'created_by', 'created_on',
+               'attachment_ids')
+    __slots__ = _fields
+
     def __init__(self,
                  status_id,
                  comment=None,
@@ -416,64 +796,89 @@ class Config(Item):
 
 
 class Client(object):
-    def __init__(self, base_url, username, password, request_timeout=600):
+    def __init__(self, base_url, username, password, request_timeout=600,
+                 connect_timeout=10, read_timeout=120, pool_size=10,
+                 retry_policy=None):
         self.username = username
         self.password = password
         self.request_timeout = request_timeout
+        self.retry_policy = retry_policy or RetryPolicy(budget=request_timeout)
+        self.timeout = (connect_timeout, read_timeout)
         self.base_url = base_url.rstrip('/') + '/index.php?/api/v2/'
-
-        Item._handler = self._query
+        self.session = self._make_session(pool_size)
+        self._statuses = None
+        self._lock = threading.Lock()
+
+    def _make_session(self, pool_size):
+        """Make keep-alive session shared by all requests of this client."""
+        session = requests.Session()
+        session.auth = (self.username, self.password)
+        session.headers.update({'Content-type': 'application/json'})
+        adapter = HTTPAdapter(pool_connections=pool_size,
+                              pool_maxsize=pool_size)
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        return session
+
+    def close(self):
+        self.session.close()
 
     def _query(self, method, url, **kwargs):
         url = self.base_url + url
-        headers = {'Content-type': 'application/json'}
+        kwargs.setdefault('timeout', self.timeout)
         logger.debug('Make {} request to {}'.format(method, url))
 
-        def _time_sleep(resp, min_interval=300, max_interval=600):
-            if resp is None:
-                logger.info("Connection error to {}".format(url))
-            else:
-                logger.info("Request error to {0}\n"
-                            "status_code: {1.status_code}\n"
-                            "headers: {1.headers}\n"
-                            "content: '{1.content}'".format(url, resp))
-            sleep = random.randint(min_interval, max_interval)
-            logger.info("Waiting for {} sec until next try".format(sleep))
-            time.sleep(sleep)
-
         start_time = time.time()
+        attempt = 0
         while True:
+            attempt += 1
+            error = None
             try:
-                response = requests.request(
+                response = self.session.request(
                     method,
                     url,
                     allow_redirects=False,
-                    auth=(self.username, self.password),
-                    headers=headers,
                     **kwargs)
                 if response.status_code < 300:
                     # Request processed successfuly
                     break
 
-            except requests.ConnectionError:
-                response = None
+            except (requests.ConnectionError, requests.Timeout) as e:
+                if isinstance(e, requests.ReadTimeout) and method != 'GET':
+                    # request may be done by server already, repeating it
+                    # would add duplicate entries
+                    raise
+                response, error = None, e
 
-            if start_time + self.request_timeout > time.time():
-                _time_sleep(response)
+            if response is None:
+                logger.info("Connection error to {}: {}".format(url, error))
+            else:
+                logger.info("Request error to {0}\n"
+                            "status_code: {1.status_code}\n"
+                            "headers: {1.headers}\n"
+                            "content: '{1.content}'".format(url, response))
+
+            elapsed = time.time() - start_time
+            delay = self.retry_policy.get_delay(attempt, response, elapsed)
+            if delay is not None:
+                logger.info("Waiting for {:.1f} sec until next try".format(
+                    delay))
+                time.sleep(delay)
                 continue
 
             # Out of tries, raise an error
             # ----------------------------
 
             # Raise the original requests.ConnectionError
-            if response is None:
-                raise
+            if error is not None:
+                raise error
             # Redirect or error
-            raise requests.HTTPError("Wrong response after trying {1} sec:\n"
+            raise requests.HTTPError("Wrong response after {1} tries "
+                                     "({2:.1f} sec):\n"
                                      "status_code: {0.status_code}\n"
                                      "headers: {0.headers}\n"
-                                     "content: '{0.content}'".format(response,
-                                                              self.request_timeout),
+                                     "content: '{0.content}'".format(
+                                         response, attempt, elapsed),
                                      response=response)
         result = response.json()
         if 'error' in result:
@@ -482,9 +887,15 @@ class Client(object):
 
     @property
     def projects(self):
-        return Collection(Project)
+        return Collection(Project, client=self)
+
+    def get_statuses(self):
+        """Return `get_statuses` data, fetched once per client."""
+        with self._lock:
+            if self._statuses is None:
+                self._statuses = self._query('GET', 'get_statuses')
+        return self._statuses
 
     @property
     def statuses(self):
-        statuses = self._query('GET', 'get_statuses')
-        return {x['id']: x['name'] for x in statuses}
+        return {x['id']: x['name'] for x in self.get_statuses()}
@@ -9,3 +9,19 @@ class NotFound(Exception):
         return u'{type} with {conditions}'.format(
             type=self.item_class._api_name().title(),
             conditions=conditions)
+
+
+class UploadError(Exception):
+    def __init__(self, run_id, results, failed_chunks):
+        self.run_id = run_id
+        self.results = results
+        self.failed_chunks = failed_chunks
+
+    def __str__(self):
+        failed_count = sum(len(chunk) for chunk, _ in self.failed_chunks)
+        return (u"Can't send {count} results in {chunks} chunks to run "
+                u"{run_id}: {error}").format(
+                    count=failed_count,
+                    chunks=len(self.failed_chunks),
+                    run_id=self.run_id,
+                    error=self.failed_chunks[0][1])
@@ -0,0 +1,83 @@
+from __future__ import absolute_import
+from email.utils import mktime_tz
+from email.utils import parsedate_tz
+import random
+import time
+
+
+class RetryPolicy(object):
+    """Decide whether a failed TestRail request should be repeated and when.
+
+    `rules` maps retryable HTTP status codes to the initial backoff delay
+    (in seconds). Any other status >= 300 is treated as permanent and is
+    never repeated. Connection errors and timeouts use
+    `connection_error_delay` as initial delay.
+
+    Delays grow exponentially with jitter and are capped by `max_delay`.
+    `Retry-After` header (if present) overrides the computed delay.
+    Retrying stops when the next try would exceed `budget` seconds since
+    the first request or after `max_attempts` requests (if it's set).
+    """
+
+    DEFAULT_RULES = {
+        409: 60.0,  # TestRail maintenance mode
+        429: 1.0,  # API rate limit
+        500: 0.5,
+        502: 0.5,
+        503: 1.0,
+        504: 0.5,
+    }
+
+    def __init__(self, max_attempts=None, budget=600, rules=None,
+                 connection_error_delay=0.5, max_delay=600):
+        self.max_attempts = max_attempts
+        self.budget = budget
+        self.rules = dict(self.DEFAULT_RULES if rules is None else rules)
+        self.connection_error_delay = connection_error_delay
+        self.max_delay = max_delay
+
+    def is_retryable(self, response):
+        return response is None or response.status_code in self.rules
+
+    def get_delay(self, attempt, response, elapsed):
+        """Return seconds to wait before next try or None to give up.
+
+        `attempt` is a number of already made requests, `response` is the
+        last response (None for connection errors), `elapsed` is seconds
+        passed since the first request.
+        """
+        if not self.is_retryable(response):
+            return None
+        if self.max_attempts is not None and attempt >= self.max_attempts:
+            return None
+        delay = self.get_retry_after(response)
+        if delay is None:
+            delay = self.get_backoff(attempt, response)
+        if elapsed + delay > self.budget:
+            return None
+        return delay
+
+    def get_backoff(self, attempt, response):
+        if response is None:
+            base = self.connection_error_delay
+        else:
+            base = self.rules[response.status_code]
+        delay = min(self.max_delay, base * 2 ** (attempt - 1))
+        # Equal jitter: spread concurrent clients, but keep a minimal wait
+        return delay / 2 + random.uniform(0, delay / 2)
+
+    @staticmethod
+    def get_retry_after(response):
+        """Parse `Retry-After` header (seconds or HTTP-date)."""
+        if response is None:
+            return None
+        value = response.headers.get('Retry-After')
+        if not value:
+            return None
+        value = value.strip()
+        if value.isdigit():
+            return float(value)
+        date = parsedate_tz(value)
+        if date is None:
+            return None
+        return max(0.0, mktime_tz(date) - time.time())
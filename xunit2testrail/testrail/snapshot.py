@@ -0,0 +1,130 @@
+from __future__ import absolute_import
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import time
+
+from .client import Case
+from .client import ItemSet
+
+logger = logging.getLogger(__name__)
+
+
+class SuiteSnapshot(object):
+    """Local copy of suite cases, kept in a JSON file.
+
+    First sync fetches all cases, next ones request only cases updated
+    after the newest known `updated_on` with `updated_after` filter.
+
+    TestRail doesn't report deleted cases in such delta, so cases are
+    dropped from the snapshot when they are marked with `is_deleted` or
+    moved to another suite, and the whole suite is re-fetched every
+    `full_sync_interval` seconds or after `invalidate`.
+
+    Whole case data is kept in the file, but cases returned by `sync` get
+    only `fields` (and id) if they are set.
+    """
+
+    version = 1
+
+    def __init__(self, suite, cache_dir, server, full_sync_interval=86400,
+                 fields=None):
+        self.suite = suite
+        self.full_sync_interval = full_sync_interval
+        self.fields = fields
+        key = '{}|{}|{}'.format(server, suite.project_id, suite.id)
+        self.path = os.path.join(cache_dir, 'suite-{}.json'.format(
+            hashlib.sha1(key.encode('utf-8')).hexdigest()))
+
+    def __repr__(self):
+        return '<SuiteSnapshot {}>'.format(self.path)
+
+    def load(self):
+        try:
+            with open(self.path) as f:
+                state = json.load(f)
+        except (IOError, OSError):
+            return None
+        except ValueError as e:
+            logger.warning("Can't read suite snapshot {}: {}".format(
+                self.path, e))
+            return None
+        if state.get('version') != self.version:
+            return None
+        return state
+
+    def save(self, state):
+        directory = os.path.dirname(self.path)
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w') as f:
+                json.dump(state, f)
+            # atomic, so concurrent reporters never read partial file
+            getattr(os, 'replace', os.rename)(tmp_path, self.path)
+        except Exception:
+            os.remove(tmp_path)
+            raise
+
+    def invalidate(self):
+        """Make next `sync` fetch all cases of the suite again."""
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
+
+    def _fetch(self, params=None):
+        return self.suite.cases.iter_data(params=params, prefetch=True)
+
+    def sync(self):
+        """Refresh snapshot and return its cases as ItemSet."""
+        state = self.load()
+        now = time.time()
+        if state is not None:
+            if now - state['full_synced_at'] > self.full_sync_interval:
+                state = None
+        if state is None:
+            logger.debug('Fetch all cases of suite {}'.format(self.suite.id))
+            cases = [(str(x['id']), x) for x in self._fetch()]
+            state = {'version': self.version, 'full_synced_at': now}
+        else:
+            cases = state['cases']
+            # step back a second, so cases updated at the same second as
+            # the newest known one are not missed
+            updated_after = max(state['cursor'] - 1, 0)
+            delta = list(self._fetch({'updated_after': updated_after}))
+            logger.debug('Fetched {} cases of suite {} updated after '
+                         '{}'.format(len(delta), self.suite.id, updated_after))
+            cases = self._apply_delta(cases, delta)
+        state['cases'] = cases
+        updated = [x.get('updated_on') or 0 for _, x in cases]
+        updated.append(state.get('cursor', 0))
+        state['cursor'] = max(updated)
+        self.save(state)
+        items = ItemSet()
+        items._item_class = Case
+        for _, data in cases:
+            if self.fields is not None:
+                data = {k: v for k, v in data.items()
+                        if k in self.fields or k == 'id'}
+            case = Case(**data)
+            case._client = self.suite._client
+            items.append(case)
+        return items
+
+    def _apply_delta(self, cases, delta):
+        order = [x for x, _ in cases]
+        cases = dict(cases)
+        for data in delta:
+            case_id = str(data['id'])
+            moved = data.get('suite_id', self.suite.id) != self.suite.id
+            if data.get('is_deleted') or moved:
+                cases.pop(case_id, None)
+                continue
+            if case_id not in cases:
+                order.append(case_id)
+            cases[case_id] = data
+        return [(x, cases[x]) for x in order if x in cases]
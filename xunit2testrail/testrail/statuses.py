@@ -0,0 +1,61 @@
+from __future__ import absolute_import
+
+import six
+
+
+class StatusResolver(object):
+    """Map xUnit case outcomes to TestRail status IDs.
+
+    `statuses` is either `{id: name}` dict or list of `get_statuses`
+    items (then status labels can be used too, which is handy for custom
+    statuses). `outcomes` updates default outcome -> status table, status
+    can be referenced by its name, label or ID.
+    """
+
+    DEFAULT_OUTCOMES = {
+        'success': 'passed',
+        'failure': 'failed',
+        'skipped': 'skipped',
+        'error': 'blocked',
+    }
+
+    def __init__(self, statuses, outcomes=None):
+        if isinstance(statuses, dict):
+            statuses = [{'id': k, 'name': v} for k, v in statuses.items()]
+        self.names = {}
+        self.ids = {}
+        for status in statuses:
+            self.names[status['id']] = status['name']
+            for key in (status['name'], status.get('label')):
+                if key:
+                    self.ids.setdefault(key.lower(), status['id'])
+
+        table = dict(self.DEFAULT_OUTCOMES)
+        table.update(outcomes or {})
+        self.outcomes = {k: (v, self.get_id(v)) for k, v in table.items()}
+
+    def __repr__(self):
+        return '<StatusResolver {}>'.format(
+            {k: v for k, (_, v) in self.outcomes.items()})
+
+    def get_id(self, status):
+        """Return ID of status by its name, label or ID."""
+        if status in self.names:
+            return status
+        if isinstance(status, six.string_types):
+            if status.isdigit() and int(status) in self.names:
+                return int(status)
+            return self.ids.get(status.lower())
+
+    def get_name(self, status_id):
+        return self.names.get(status_id)
+
+    def get_status_name(self, outcome):
+        """Return name of TestRail status configured for outcome."""
+        return self.outcomes[outcome][0]
+
+    def resolve(self, outcome):
+        """Return TestRail status ID for xUnit outcome or None."""
+        status = self.outcomes.get(outcome)
+        if status is not None:
+            return status[1]
@@ -1,5 +1,6 @@
 import abc
 import re
+import string
 from uuid import UUID
 from collections import defaultdict
 import logging
@@ -8,6 +9,8 @@ import logging
 import prettytable
 import six
 
+from .similarity import TrigramIndex
+
 logger = logging.getLogger(__name__)
 
 
@@ -65,6 +68,21 @@ class NotNoneValue(object):
 
 @six.add_metaclass(abc.ABCMeta)
 class CaseMapper(object):
+    """Base of xUnit to TestRail cases mappers.
+
+    For xUnit cases without matches `suggest_count` most similar by title
+    TestRail cases are suggested (see `suggestions` after `map`). With
+    `auto_map_threshold` such case is mapped to the most similar not mapped
+    TestRail case, if similarity (0..1) is at least the threshold.
+    """
+
+    def __init__(self, suggest_count=0, auto_map_threshold=None):
+        self.suggest_count = suggest_count
+        self.auto_map_threshold = auto_map_threshold
+        # (xUnit case without matches, [(similarity, TestRail case)])
+        self.suggestions = []
+        self._title_index = (None, None, None)
+
     def describe_xunit_case(self, case):
         xunit_dict = {
             'classname': case.classname,
@@ -135,6 +153,31 @@ class CaseMapper(object):
     def get_suitable_cases(self, xunit_case, cases):
         """Return all suitable testrail cases for xunit case."""
 
+    def get_xunit_title(self, xunit_case):
+        """Return TestRail title, which xUnit case would have."""
+        return xunit_case.methodname
+
+    def get_testrail_fields(self):
+        """Return names of TestRail case fields used for mapping."""
+        return ['title']
+
+    def get_title_index(self, cases):
+        """Return TrigramIndex of TestRail case titles.
+
+        It's made once while the same `cases` list is passed.
+        """
+        indexed_cases, size, index = self._title_index
+        if indexed_cases is not cases or size != len(cases):
+            index = TrigramIndex([getattr(x, 'title', None) for x in cases])
+            self._title_index = (cases, len(cases), index)
+        return index
+
+    def suggest_cases(self, xunit_case, cases, count=3):
+        """Return up to `count` (similarity, case) most similar by title."""
+        index = self.get_title_index(cases)
+        return [(score, cases[i]) for score, i in
+                index.search(self.get_xunit_title(xunit_case), count)]
+
     def map(self, xunit_suite, testrail_cases, testrail_suite,
             testrail_milestone_id, allow_duplicates=False,
             testrail_add_missing_cases=False, testrail_case_custom_fields=None,
@@ -151,13 +194,50 @@ class CaseMapper(object):
         logger.info("Available custom fields for cases: \n{}"
                     .format("\n".join(custom_case_items)))
 
+        xunit_count = 0
+        # cases without matches are processed after all matched ones, so
+        # auto mapping takes only TestRail cases, which are free
+        unmatched = []
         for xunit_case in xunit_suite:
+            xunit_count += 1
             suitable_cases = self.get_suitable_cases(xunit_case,
                                                      testrail_cases)
             if len(suitable_cases) == 0:
+                unmatched.append(xunit_case)
+            for testrail_case in suitable_cases:
+                mapping.append((testrail_case, xunit_case))
+
+        self.suggestions = []
+        suggest = (self.suggest_count or self.auto_map_threshold is not None)
+        mapped_ids = set(x.id for x, _ in mapping)
+        for xunit_case in unmatched:
+            suitable_cases = []
+            candidates = []
+            if suggest and len(testrail_cases):
+                candidates = self.suggest_cases(
+                    xunit_case, testrail_cases,
+                    max(self.suggest_count, 1))
+            if self.auto_map_threshold is not None:
+                for score, testrail_case in candidates:
+                    if score < self.auto_map_threshold:
+                        break
+                    if testrail_case.id not in mapped_ids:
+                        logger.info(
+                            "xUnit case `{0}` is mapped to similar TestRail "
+                            "case `{1.title}` ({2:.2f})".format(
+                                xunit_case, testrail_case, score))
+                        mapped_ids.add(testrail_case.id)
+                        suitable_cases = [testrail_case]
+                        break
+            if len(suitable_cases) == 0:
+                if self.suggest_count:
+                    candidates = candidates[:self.suggest_count]
+                    self.suggestions.append((xunit_case, candidates))
                 logger.warning(
                     "xUnit case `{0}` doesn't match "
-                    "any TestRail Case".format(xunit_case))
+                    "any TestRail Case{1}".format(xunit_case, ''.join(
+                        '\n  similar: `{0.title}` ({1:.2f})'.format(x, score)
+                        for score, x in candidates)))
 
                 if testrail_add_missing_cases:
                     #xunit_id = self.get_xunit_id(xunit_case, use_hash=True)
@@ -197,13 +277,18 @@ class CaseMapper(object):
             for testrail_case in suitable_cases:
                 mapping.append((testrail_case, xunit_case))
 
-        if len(mapping) == 0 and all([xunit_suite.countTestCases(),
-                                      len(testrail_cases)]):
+        if len(mapping) == 0 and all([xunit_count, len(testrail_cases)]):
             self.print_pair_data(testrail_cases[-1], xunit_case)
         self._check_collisions(mapping, allow_duplicates=allow_duplicates)
         return dict(mapping)
 
 
+# groups of symbols to split TestRail case ids with, if xUnit id has none
+# of them
+SPLIT_SYMBOLS = [(x, re.compile(r'[{}]'.format(x)))
+                 for x in (r'a-zA-Z', r'\(\)', r'\[\]', r',')]
+
+
 class TemplateCaseMapper(CaseMapper):
     """Template string based mapper."""
 
@@ -213,6 +298,11 @@ class TemplateCaseMapper(CaseMapper):
         self.xunit_name_template = xunit_name_template
         self.testrail_name_template = testrail_name_template
         self.testrail_case_max_name_lenght = testrail_case_max_name_lenght
+        # TestRail cases, which keys and indexes are made for
+        self._prepared_cases = None
+        self._prepared_state = None
+        self._keys = None
+        self._indexes = {}
 
     #def get_xunit_id(self, xunit_case, use_hash=False):
     def get_xunit_id(self, xunit_case):
@@ -244,6 +334,21 @@ class TemplateCaseMapper(CaseMapper):
         else:
             return xunit_dict['methodname']
 
+    def print_pair_data(self, testrail_case, xunit_case):
+        super(TemplateCaseMapper, self).print_pair_data(testrail_case,
+                                                        xunit_case)
+        # TestRail id is already made, if case was matched with
+        for case, key in zip(self._prepared_cases or (), self._keys or ()):
+            if case is testrail_case:
+                print('TestRail case id by template: {}'.format(key))
+                break
+
+    def get_xunit_title(self, xunit_case):
+        try:
+            return self.get_xunit_id(xunit_case)
+        except NoneValueException:
+            return xunit_case.methodname
+
     def get_suitable_cases(self, xunit_case, cases):
         try:
             xunit_id = self.get_xunit_id(xunit_case)
@@ -254,34 +359,181 @@ class TemplateCaseMapper(CaseMapper):
             return []
 
         # Search symbols groups, which is absent in xunit_id
-        split_symbols_base = [r'a-zA-Z', r'\(\)', r'\[\]', r',', ]
         split_symbols = ''
-        for group in split_symbols_base:
-            if re.search(r'[{}]'.format(group), xunit_id) is None:
+        for group, expr in SPLIT_SYMBOLS:
+            if expr.search(xunit_id) is None:
                 split_symbols += group
 
+        index = self.get_index(cases, split_symbols)
+        return list(index.get(xunit_id, ()))
+
+    def _prepare(self, cases):
+        """Drop keys and indexes made for other cases or template.
+
+        They are kept while the same `cases` list (of the same length) is
+        passed.
+        """
+        state = (len(cases), self.testrail_name_template)
+        if self._prepared_cases is not cases or self._prepared_state != state:
+            self._prepared_cases = cases
+            self._prepared_state = state
+            self._keys = None
+            self._indexes = {}
+
+    def get_testrail_fields(self):
+        fields = super(TemplateCaseMapper, self).get_testrail_fields()
+        return fields + self.get_template_fields()
+
+    def get_template_fields(self):
+        """Return names of TestRail case fields used by name template."""
+        fields = []
+        for _, name, _, _ in string.Formatter().parse(
+                self.testrail_name_template):
+            if name:
+                # "{field.attr}" or "{field[0]}" needs "field" only
+                name = re.match(r'[^.\[]*', name).group()
+                if name not in fields:
+                    fields.append(name)
+        return fields
+
+    def get_testrail_keys(self, cases):
+        """Return list of TestRail ids of cases (in the same order).
+
+        Ids are made once with `testrail_name_template` of case string
+        fields.
+        """
+        self._prepare(cases)
+        if self._keys is None:
+            fields = self.get_template_fields()
+            template = self.testrail_name_template
+            keys = []
+            for case in cases:
+                case_data = {}
+                for name in fields:
+                    value = case.get_field(name)
+                    if isinstance(value, six.string_types):
+                        case_data[name] = value
+                keys.append(template.format(**case_data))
+            self._keys = keys
+        return self._keys
+
+    def get_index(self, cases, split_symbols):
+        """Return dict of TestRail case id groups to cases with them.
+
+        TestRail case ids are split with `split_symbols` into groups (case
+        is listed as many times as it has the group), with empty
+        `split_symbols` whole ids are used.
+        """
+        self._prepare(cases)
+        index = self._indexes.get(split_symbols)
+        if index is not None:
+            return index
+
         split_expr = re.compile(r'[{}]'.format(split_symbols))\
             if split_symbols else None
-        match_cases = []
-        for case in cases:
-            case_data = self.describe_testrail_case(case)
-            testrail_id = self.testrail_name_template.format(**case_data)
-
+        index = defaultdict(list)
+        for case, testrail_id in zip(cases, self.get_testrail_keys(cases)):
             if split_expr is None:
-                if xunit_id == testrail_id:
-                    match_cases.append(case)
+                index[testrail_id].append(case)
             else:
-                groups = [x for x in split_expr.split(testrail_id) if x]
-                groups.reverse()
-                for group in groups:
-                    if group == xunit_id:
-                        match_cases.append(case)
-        return match_cases
+                for group in split_expr.split(testrail_id):
+                    if group:
+                        index[group].append(case)
+        self._indexes[split_symbols] = index
+        return index
+
+
+class IdCaseMapper(TemplateCaseMapper):
+    """Mapper by TestRail case ids, which xUnit cases carry.
+
+    Case id is taken from `testrail_case_id` property of xUnit case, its
+    `id` attribute or `(12345)` in its name (`C12345` form is accepted too).
+    With `testrail_uuid_field` cases are also matched by `id-<uuid>` in the
+    name with this TestRail case field. Other cases are matched by
+    templates.
+    """
+
+    CASE_ID_PROPERTY = 'testrail_case_id'
+
+    def __init__(self, xunit_name_template, testrail_name_template,
+                 testrail_uuid_field=None, **kwargs):
+        super(IdCaseMapper, self).__init__(xunit_name_template,
+                                           testrail_name_template, **kwargs)
+        self.testrail_uuid_field = testrail_uuid_field
+
+    def get_testrail_fields(self):
+        fields = super(IdCaseMapper, self).get_testrail_fields()
+        if self.testrail_uuid_field:
+            fields.append(self.testrail_uuid_field)
+        return fields
+
+    def get_xunit_case_id(self, xunit_case):
+        """Return TestRail case id carried by xUnit case or None."""
+        properties = getattr(xunit_case, 'properties', None) or {}
+        for value in (properties.get(self.CASE_ID_PROPERTY),
+                      xunit_case.report_id,
+                      find_id(xunit_case.methodname)):
+            if value:
+                value = value.strip()
+                if value[:1] in ('C', 'c'):
+                    value = value[1:]
+                if value.isdigit():
+                    return int(value)
+
+    def get_id_index(self, cases):
+        """Return dict of TestRail case ids to cases."""
+        self._prepare(cases)
+        # split symbols are strings, so the key can't clash with them
+        index = self._indexes.get(('id',))
+        if index is None:
+            index = self._indexes[('id',)] = {case.id: case for case in cases}
+        return index
+
+    def get_uuid_index(self, cases):
+        """Return dict of UUIDs in `testrail_uuid_field` to cases."""
+        self._prepare(cases)
+        key = ('uuid', self.testrail_uuid_field)
+        index = self._indexes.get(key)
+        if index is None:
+            index = defaultdict(list)
+            for case in cases:
+                value = case.get_field(self.testrail_uuid_field)
+                if not isinstance(value, six.string_types):
+                    continue
+                try:
+                    uuid = str(UUID(hex=value.strip()))
+                except ValueError:
+                    continue
+                index[uuid].append(case)
+            self._indexes[key] = index
+        return index
+
+    def get_suitable_cases(self, xunit_case, cases):
+        case_id = self.get_xunit_case_id(xunit_case)
+        if case_id is not None:
+            case = self.get_id_index(cases).get(case_id)
+            if case is not None:
+                return [case]
+        if self.testrail_uuid_field:
+            uuid = find_uuid(xunit_case.methodname)
+            if uuid is not None:
+                suitable_cases = self.get_uuid_index(cases).get(uuid)
+                if suitable_cases:
+                    return list(suitable_cases)
+        return super(IdCaseMapper, self).get_suitable_cases(xunit_case,
+                                                            cases)
 
 
 def truncate_head(banner, text, max_len):
-    max_text_len = min(max_len - len(banner), len(text))
     start = '...\n'
+    if hasattr(text, 'tail'):
+        # lazy payload, read only the part which fits
+        max_text_len = max_len - len(banner)
+        if max_text_len > len(start):
+            text = text.tail(max_text_len + 1)
+        else:
+            text = text.read()
+    max_text_len = min(max_len - len(banner), len(text))
     if max_text_len < len(text):
         max_text_len -= len(start)
         text = start + text[-max_text_len:]